@@ -0,0 +1,330 @@
+# Timed benchmarks over a seeded synthetic corpus. Results are written as
+# JSON lines, so that runs (e.g., before and after a change) can be compared:
+#
+#   python -m typochecker.benchmark --out before.jsonl
+#   python -m typochecker.benchmark --out after.jsonl --compare before.jsonl
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import IO, Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from typochecker.corpus import count_corpus
+from typochecker.corrector import iterate_over_lines, review_scans
+from typochecker.levenshtein_corrector import (
+    get_suspected_typos,
+    get_typo_candidates,
+    order_typo_candidates,
+)
+from typochecker.scanner import get_typos_in_string, scan_files
+from typochecker.suggestion_response import (
+    AlwaysRespondAccept,
+    AlwaysRespondIgnore,
+    AlwaysRespondKeep,
+    Ignore,
+    Keep,
+    Literal,
+    RecordingResponse,
+    ReplayResponse,
+    SuggestionResponse,
+)
+from typochecker.synthetic import generate_corpus
+from typochecker.typo_index import TypoIndex
+from typochecker.typo_table import DEFAULT_TYPO_LOCS, load_typos
+from typochecker.utils import (
+    candidates,
+    get_candidate_index,
+    get_known_words,
+    get_words,
+    parse_typos_file,
+)
+
+# Bump whenever the benchmarks (or their inputs) change, so that results
+# from different versions are not compared
+BENCHMARK_VERSION = 1
+
+# A slowdown beyond this ratio (and this many seconds, to ignore noise in
+# the fastest benchmarks) is reported as a regression
+REGRESSION_RATIO = 1.1
+MIN_REGRESSION_SECONDS = 0.001
+
+
+class Benchmark(NamedTuple):
+    name: str
+    # Returns the number of items (e.g., lines or words) processed
+    run: Callable[..., int]
+    # Returns the arguments to `run`; not timed
+    setup: Callable[[], Tuple] = tuple
+
+
+class ScriptedResponse(SuggestionResponse):
+    """
+    A seeded mix of accepting, keeping and ignoring, standing in for a person
+    """
+
+    def __init__(self, seed: int = 0) -> None:
+        super().__init__()
+        self.rng = random.Random(seed)
+
+    def get_response(self, line, typo_span, suggestion, orig, prompt):
+        choice = self.rng.random()
+        if choice < 0.6:
+            return Literal(suggestion)
+        elif choice < 0.9:
+            return Keep()
+        return Ignore(orig)
+
+
+def time_benchmark(benchmark: Benchmark, repeat: int) -> Dict[str, Any]:
+    timings = []
+    items = 0
+
+    for _ in range(repeat):
+        args = benchmark.setup()
+        start = time.perf_counter()
+        items = benchmark.run(*args)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    return {
+        "name": benchmark.name,
+        "repeat": repeat,
+        "best": timings[0],
+        "median": timings[len(timings) // 2],
+        "items": items,
+    }
+
+
+def get_benchmarks(
+    paths: List[str], typos: TypoIndex, work_dir: str, session: Optional[str] = None
+) -> List[Benchmark]:
+    """
+    Benchmarks over the corpus at `paths`; sessions are replayed over copies
+    of it, made at `work_dir`
+    """
+    corpus_lines = []
+    for path in paths:
+        with open(path, "r") as f:
+            corpus_lines.extend(f.readlines())
+    text = "".join(corpus_lines)
+    found_typos = get_typos_in_string(text, typos)
+
+    def run_parse_typos_file() -> int:
+        return sum(len(parse_typos_file(loc)) for loc in DEFAULT_TYPO_LOCS)
+
+    def run_get_typos_in_string() -> int:
+        get_typos_in_string(text, typos)
+        return len(corpus_lines)
+
+    def run_iterate_over_lines(all_typos, responder) -> int:
+        iterate_over_lines(corpus_lines, all_typos, found_typos, responder)
+        return len(corpus_lines)
+
+    def run_count_corpus(jobs) -> int:
+        searched, _ = count_corpus(paths, jobs=jobs)
+        return searched
+
+    _, word_counter = count_corpus(paths)
+    suspects = get_suspected_typos(word_counter, get_known_words(), typos)
+
+    # Queries are timed, not loading (or building) the index
+    get_candidate_index()
+
+    def run_candidates(max_distance) -> int:
+        for word in suspects:
+            candidates(word, max_distance)
+        return len(suspects)
+
+    def run_levenshtein_pipeline() -> int:
+        _, word_counter = count_corpus(paths)
+        sorted_words = get_suspected_typos(word_counter, get_known_words(), typos)
+        order_typo_candidates(get_typo_candidates(sorted_words, word_counter))
+        return len(paths)
+
+    # A session is replayed against a fresh copy of the corpus each time
+    corpus_dir = os.path.commonpath(paths)
+
+    def copy_corpus() -> List[str]:
+        if os.path.exists(work_dir):
+            shutil.rmtree(work_dir)
+        shutil.copytree(corpus_dir, work_dir)
+        return [os.path.join(work_dir, os.path.relpath(p, corpus_dir)) for p in paths]
+
+    if session:
+        records = list(ReplayResponse.from_file(session).records)
+    else:
+        recording = RecordingResponse(ScriptedResponse())
+        copied = copy_corpus()
+        review_scans(scan_files(copied, typos), TypoIndex(typos), recording)
+        records = recording.records
+
+    def setup_session() -> Tuple:
+        return copy_corpus(), TypoIndex(typos), ReplayResponse(records)
+
+    def run_session(copied, all_typos, responder) -> int:
+        review_scans(scan_files(copied, all_typos), all_typos, responder)
+        return len(records)
+
+    benchmarks = [
+        Benchmark("parse_typos_file", run_parse_typos_file),
+        Benchmark("get_typos_in_string", run_get_typos_in_string),
+    ]
+    for responder_cls in [AlwaysRespondAccept, AlwaysRespondIgnore, AlwaysRespondKeep]:
+        benchmarks.append(
+            Benchmark(
+                "iterate_over_lines[{}]".format(responder_cls.__name__),
+                run_iterate_over_lines,
+                lambda cls=responder_cls: (TypoIndex(typos), cls()),
+            )
+        )
+    for max_distance in [1, 2]:
+        benchmarks.append(
+            Benchmark(
+                "candidates[{}]".format(max_distance),
+                run_candidates,
+                lambda d=max_distance: (d,),
+            )
+        )
+    for jobs in [1, 2]:
+        benchmarks.append(
+            Benchmark(
+                "count_corpus[jobs={}]".format(jobs),
+                run_count_corpus,
+                lambda j=jobs: (j,),
+            )
+        )
+    benchmarks.append(Benchmark("levenshtein_pipeline", run_levenshtein_pipeline))
+    benchmarks.append(Benchmark("session_replay", run_session, setup_session))
+
+    return benchmarks
+
+
+def compare_results(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], out: IO[str]
+) -> int:
+    """Print how each benchmark compares to `baseline`; returns the regressions"""
+    baseline_by_name = {r["name"]: r for r in baseline if "best" in r}
+    regressions = 0
+
+    for result in results:
+        old = baseline_by_name.get(result["name"])
+        if old is None:
+            continue
+
+        ratio = result["best"] / old["best"] if old["best"] else float("inf")
+        flag = ""
+        if (
+            ratio > REGRESSION_RATIO
+            and result["best"] - old["best"] > MIN_REGRESSION_SECONDS
+        ):
+            flag = "  <-- regression"
+            regressions += 1
+
+        out.write(
+            "{:<40} {:>10.4f}s {:>10.4f}s {:>7.2f}x{}\n".format(
+                result["name"], old["best"], result["best"], ratio, flag
+            )
+        )
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", help="Write results to this file (default: stdout)")
+    parser.add_argument(
+        "--compare",
+        metavar="FILE",
+        help="Compare to earlier results, exiting with status 1 on a regression",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=200, help="Lines per file")
+    parser.add_argument("--typo-density", type=float, default=0.001)
+    parser.add_argument(
+        "--session",
+        metavar="FILE",
+        help="Replay this session (recorded with `corrector --record-session` "
+        "over the same corpus), rather than a scripted one",
+    )
+
+    args = parser.parse_args()
+
+    # Results from other versions of the benchmarks are not comparable, so
+    # refuse before spending the time to run them
+    baseline: List[Dict[str, Any]] = []
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = [json.loads(line) for line in f if line.strip()]
+
+        version = baseline[0].get("benchmark_version") if baseline else None
+        if version != BENCHMARK_VERSION:
+            sys.stderr.write(
+                "Cannot compare to {}: it was run with benchmark version {} "
+                "(rather than {})\n".format(args.compare, version, BENCHMARK_VERSION)
+            )
+            sys.exit(2)
+
+    corpus_params = {
+        "seed": args.seed,
+        "files": args.files,
+        "lines": args.lines,
+        "typo_density": args.typo_density,
+    }
+    results = []
+
+    with tempfile.TemporaryDirectory() as d, open(os.devnull, "w") as devnull:
+        # Progress messages (and prompts being answered) are not timed output
+        with contextlib.redirect_stdout(devnull):
+            environment = {
+                "name": "environment",
+                "benchmark_version": BENCHMARK_VERSION,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "dictionary_words": len(get_words()),
+                "corpus": corpus_params,
+            }
+
+            typos = load_typos(cache_dir=os.path.join(d, "cache"))
+            paths = generate_corpus(
+                os.path.join(d, "corpus"),
+                typos,
+                num_files=args.files,
+                lines_per_file=args.lines,
+                typo_density=args.typo_density,
+                seed=args.seed,
+            )
+            benchmarks = get_benchmarks(
+                paths, typos, os.path.join(d, "session"), args.session
+            )
+
+        for benchmark in benchmarks:
+            if args.only and args.only not in benchmark.name:
+                continue
+
+            with contextlib.redirect_stdout(devnull):
+                result = time_benchmark(benchmark, args.repeat)
+            results.append(result)
+            sys.stderr.write("{name}: {best:.4f}s\n".format(**result))
+
+    out = open(args.out, "w") if args.out else sys.stdout
+    for record in [environment] + results:
+        out.write(json.dumps(record) + "\n")
+    if args.out:
+        out.close()
+
+    if args.compare:
+        if baseline[0].get("corpus") != corpus_params:
+            sys.stderr.write("Warning: baseline was run over a different corpus\n")
+
+        regressions = compare_results(results, baseline, sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,174 @@
+import io
+import itertools
+import pickle
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import (
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+
+from typochecker.filetypes import get_skip_reason, read_text
+from typochecker.report import get_suggestions
+from typochecker.scanner import (
+    FileScan,
+    get_jobs,
+    get_worker_typos,
+    iter_typo_occurrences,
+    scan_files,
+)
+from typochecker.typo_index import TypoIndex
+from typochecker.typo_table import DEFAULT_TYPO_LOCS, load_typos
+
+
+class Occurrence(NamedTuple):
+    """A typo found in a text (as reported by `corrector --report`)"""
+
+    path: Optional[str]
+    line: int  # 1-based
+    column: int  # 1-based
+    typo: str
+    suggestions: List[str]
+
+
+class FileCheck(NamedTuple):
+    path: str
+    typos: List[Occurrence]
+    error: Optional[str] = None
+    skipped: Optional[str] = None
+
+
+def _check_chunk(table: bytes, paths: List[str]) -> List[FileCheck]:
+    checker = Checker(get_worker_typos(table))
+    return [checker.check_file(f) for f in paths]
+
+
+class Checker(object):
+    """
+    Check texts and files for typos, against a typo table that is loaded
+    (and has whitelisted words removed) once, however many checks are made.
+    Worker processes (see check_many) are also started once, and kept until
+    the checker is closed.
+
+    >>> checker = Checker(TypoIndex({'tpyo': 'typo', 'wich': 'which, witch'}))
+    >>> [o.typo for o in checker.check_text('A tpyo, Wich one?')]
+    ['tpyo', 'Wich']
+    >>> checker.check_text('Wich one?')[0].suggestions
+    ['Which', 'Witch']
+    """
+
+    def __init__(self, typos: TypoIndex) -> None:
+        self.typos = typos
+
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.jobs = 0
+        # The table, as sent to the workers
+        self.table = b""
+
+    def __enter__(self) -> "Checker":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the worker processes, if any were started"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def get_executor(self, jobs: int) -> ProcessPoolExecutor:
+        if self.executor is None or jobs != self.jobs:
+            self.close()
+            self.executor = ProcessPoolExecutor(max_workers=jobs)
+            self.jobs = jobs
+            self.table = pickle.dumps(self.typos, pickle.HIGHEST_PROTOCOL)
+
+        return self.executor
+
+    @classmethod
+    def load(
+        cls,
+        whitelist: Sequence[str] = (),
+        typo_locs: Sequence[str] = DEFAULT_TYPO_LOCS,
+        cache_dir: Optional[str] = None,
+    ) -> "Checker":
+        """A checker for the (compiled, and cached) typo table"""
+        return cls(load_typos(typo_locs, whitelist, cache_dir))
+
+    def get_occurrences(
+        self, lines: Iterable[str], path: Optional[str] = None
+    ) -> List[Occurrence]:
+        return [
+            Occurrence(path, line_no, column, typo, get_suggestions(typo, self.typos))
+            for line_no, column, typo in iter_typo_occurrences(lines, self.typos)
+        ]
+
+    def check_text(self, text: str, path: Optional[str] = None) -> List[Occurrence]:
+        """Every typo in `text` (e.g., an unsaved buffer, to be saved as `path`)"""
+        return self.get_occurrences(io.StringIO(text, newline=None), path)
+
+    def check_file(self, path: str) -> FileCheck:
+        """
+        Every typo in a file; binary, generated, etc. files are skipped, and
+        problems reading the file are reported rather than raised
+        """
+        try:
+            reason = get_skip_reason(path)
+            if reason:
+                return FileCheck(path, [], skipped=reason)
+
+            text, _ = read_text(path)
+        except OSError:
+            return FileCheck(path, [], "unreadable")
+
+        return FileCheck(path, self.check_text(text, path))
+
+    def locate(self, scan: FileScan) -> FileCheck:
+        """Find where the typos found by a scan of a file are"""
+        if not scan.typos:
+            return FileCheck(scan.path, [], scan.error, scan.skipped)
+
+        return self.check_file(scan.path)
+
+    def check_many(
+        self, paths: Iterable[str], jobs: int = 1, chunksize: int = 32
+    ) -> Iterator[FileCheck]:
+        """
+        Check files, yielding each check as soon as it is done, in the same
+        order as `paths`. With `jobs` != 1 (0 for one per core), files are
+        checked by that many worker processes, which locate the typos too;
+        otherwise files are scanned here, and only those with typos are
+        read again to locate them.
+        """
+        jobs = get_jobs(jobs)
+        if jobs == 1:
+            for scan in scan_files(paths, self.typos):
+                yield self.locate(scan)
+            return
+
+        executor = self.get_executor(jobs)
+        it = iter(paths)
+
+        # A bounded number of chunks in flight, as in scan_files
+        pending: Deque[Future] = deque()
+        try:
+            while True:
+                chunk = list(itertools.islice(it, chunksize))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_check_chunk, self.table, chunk))
+
+                while pending and (len(pending) >= 4 * jobs or pending[0].done()):
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
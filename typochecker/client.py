@@ -0,0 +1,124 @@
+# A thin client for the resident checker (see typochecker.server). Only the
+# standard library is imported, so that each check costs little more than a
+# round trip over the socket:
+#
+#   python -m typochecker.client path/to/file.py other/file.md
+#   cat draft.md | python -m typochecker.client --stdin-name draft.md
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import Any, Dict, Optional, TextIO
+
+
+def get_default_socket_loc() -> str:
+    """In the user's runtime directory if there is one (only they can use it)"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "typochecker.sock")
+
+    return os.path.join(
+        tempfile.gettempdir(), "typochecker-{}.sock".format(os.getuid())
+    )
+
+
+class Client(object):
+    """
+    A connection to the server; requests are answered in turn, one JSON
+    object per line each way
+    """
+
+    def __init__(self, loc: Optional[str] = None) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(loc or get_default_socket_loc())
+        except OSError:
+            self.sock.close()
+            raise
+        self.responses = self.sock.makefile("rb")
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.responses.close()
+        self.sock.close()
+
+    def request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self.sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+        line = self.responses.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection")
+
+        return json.loads(line)
+
+    def check_path(self, path: str) -> Dict[str, Any]:
+        # The server may run elsewhere in the file system
+        return self.request({"path": os.path.abspath(path)})
+
+    def check_text(self, text: str, path: Optional[str] = None) -> Dict[str, Any]:
+        return self.request({"text": text, "path": path})
+
+
+def write_typos(path: str, response: Dict[str, Any], out: TextIO) -> int:
+    """
+    Write the typos in a response as JSON lines, as `corrector --report`
+    does; returns the number written
+    """
+    if "error" in response:
+        sys.stderr.write("{}: {}\n".format(path, response["error"]))
+        return 0
+
+    typos = response.get("typos", [])
+    for record in typos:
+        record["path"] = path
+        out.write(json.dumps(record) + "\n")
+
+    return len(typos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="*", help="Files to check")
+    parser.add_argument(
+        "--stdin-name",
+        metavar="NAME",
+        help="Also check the text on stdin (e.g., an unsaved buffer), "
+        "reporting it as NAME",
+    )
+    parser.add_argument(
+        "--socket",
+        help="Connect to the server at this socket (default: {})".format(
+            get_default_socket_loc()
+        ),
+    )
+    args = parser.parse_args()
+
+    try:
+        client = Client(args.socket)
+    except OSError as e:
+        sys.stderr.write(
+            "Could not connect to the server ({}); start it with "
+            "`python -m typochecker.server`\n".format(e)
+        )
+        sys.exit(2)
+
+    typo_cnt = 0
+    with client:
+        responses = [(path, client.check_path(path)) for path in args.paths]
+        if args.stdin_name:
+            responses.append(
+                (args.stdin_name, client.check_text(sys.stdin.read(), args.stdin_name))
+            )
+
+    for path, response in responses:
+        typo_cnt += write_typos(path, response, sys.stdout)
+
+    sys.exit(1 if typo_cnt else 0)
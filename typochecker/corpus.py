@@ -0,0 +1,127 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from typochecker.filetypes import get_skip_reason
+from typochecker.scanner import get_jobs
+from typochecker.utils import get_words_in_file
+
+# (number of files searched, lowercased word counts)
+WordCounts = Tuple[int, Counter]
+
+
+def count_words_in_file(f: str, max_word_len: Optional[int] = None) -> WordCounts:
+    """
+    Count the (lowercased) words of a file, unless it is skipped; words
+    longer than `max_word_len` are dropped, rather than shipped and merged
+    """
+    try:
+        # Skip binary, generated, etc. files before trying to decode them
+        if get_skip_reason(f):
+            return 0, Counter()
+    except OSError:
+        return 0, Counter()
+
+    try:
+        words = [w.lower() for w in get_words_in_file(f)]
+    except OSError:
+        return 1, Counter()
+
+    if max_word_len is not None:
+        words = [w for w in words if len(w) <= max_word_len]
+
+    return 1, Counter(words)
+
+
+def count_words_in_files(
+    paths: Iterable[str], max_word_len: Optional[int] = None
+) -> WordCounts:
+    searched = 0
+    word_counter: Counter = Counter()
+
+    for f in paths:
+        file_searched, file_counter = count_words_in_file(f, max_word_len)
+        searched += file_searched
+        word_counter.update(file_counter)
+
+    return searched, word_counter
+
+
+def _count_words_in_each_file(
+    paths: List[str], max_word_len: Optional[int]
+) -> List[WordCounts]:
+    return [count_words_in_file(f, max_word_len) for f in paths]
+
+
+def count_each_file(
+    paths: Iterable[str],
+    jobs: int = 1,
+    chunksize: int = 64,
+    max_word_len: Optional[int] = None,
+) -> Iterator[Tuple[str, WordCounts]]:
+    """Yield each file with its own counts, in order, in parallel if `jobs` != 1"""
+    jobs = get_jobs(jobs)
+
+    if jobs == 1:
+        for f in paths:
+            yield f, count_words_in_file(f, max_word_len)
+        return
+
+    paths = list(paths)
+    chunks = [paths[i : i + chunksize] for i in range(0, len(paths), chunksize)]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(
+            _count_words_in_each_file, chunks, [max_word_len] * len(chunks)
+        )
+        for chunk, counts in zip(chunks, results):
+            yield from zip(chunk, counts)
+
+
+def merge_word_counts(a: WordCounts, b: WordCounts) -> WordCounts:
+    """
+    >>> merge_word_counts((1, Counter(a=1, b=2)), (2, Counter(b=1, c=1)))
+    (3, Counter({'b': 3, 'a': 1, 'c': 1}))
+    """
+    (searched_a, counts_a), (searched_b, counts_b) = a, b
+
+    # Add the smaller counter into the larger one
+    if len(counts_a) < len(counts_b):
+        counts_a, counts_b = counts_b, counts_a
+    counts_a.update(counts_b)
+
+    return searched_a + searched_b, counts_a
+
+
+def count_corpus(
+    paths: Iterable[str],
+    jobs: int = 1,
+    chunksize: int = 64,
+    max_word_len: Optional[int] = None,
+) -> WordCounts:
+    """
+    Count the words of a corpus, in parallel if `jobs` != 1: each worker
+    counts chunks of files, and their counts are merged here, as they come
+    in. (Merging in the pool would ship the growing total between processes
+    over and over.) The counts are the same as the serial ones.
+
+    >>> searched, word_counter = count_corpus([__file__])
+    >>> searched, word_counter['counter'] > 0
+    (1, True)
+    """
+    jobs = get_jobs(jobs)
+
+    if jobs == 1:
+        return count_words_in_files(paths, max_word_len)
+
+    paths = list(paths)
+    chunks = [paths[i : i + chunksize] for i in range(0, len(paths), chunksize)]
+    total: WordCounts = (0, Counter())
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for partial in executor.map(
+            count_words_in_files, chunks, [max_word_len] * len(chunks)
+        ):
+            total = merge_word_counts(total, partial)
+
+    return total
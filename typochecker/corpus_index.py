@@ -0,0 +1,157 @@
+import hashlib
+import marshal
+import os
+import sqlite3
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from typochecker.corpus import WordCounts, count_each_file
+from typochecker.utils import get_cache_dir
+
+# Bump whenever counting (e.g., tokenizing or filtering) changes,
+# so that counts from older versions are not reused
+CORPUS_INDEX_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    searched INTEGER NOT NULL,
+    counts BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+"""
+
+
+def get_default_corpus_index_loc(root: str) -> str:
+    """One index per corpus (i.e., directory searched)"""
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8", "surrogateescape"))
+    return os.path.join(get_cache_dir(), "corpus-{}.sqlite3".format(digest.hexdigest()))
+
+
+def subtract_counts(word_counter: Counter, counts: Dict[str, int]) -> None:
+    """
+    Remove counts previously added, dropping words that are no longer seen
+
+    >>> word_counter = Counter(a=2, b=1)
+    >>> subtract_counts(word_counter, {'a': 1, 'b': 1})
+    >>> word_counter
+    Counter({'a': 1})
+    """
+    for word, cnt in counts.items():
+        remaining = word_counter[word] - cnt
+        if remaining > 0:
+            word_counter[word] = remaining
+        else:
+            del word_counter[word]
+
+
+class CorpusIndex(object):
+    """
+    On-disk word counts of a corpus, per file and in aggregate.
+
+    Only files added, removed or modified (by mtime and size) since the last
+    update are counted again; their previous counts are subtracted from the
+    aggregate, rather than the whole corpus being recounted.
+    """
+
+    def __init__(self, loc: str, max_word_len: Optional[int] = None) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(loc)), exist_ok=True)
+
+        self.conn = sqlite3.connect(loc, timeout=30)
+        self.conn.executescript(SCHEMA)
+        self.max_word_len = max_word_len
+
+        # Counts made with other settings are discarded
+        key = "{}:{}".format(CORPUS_INDEX_VERSION, max_word_len)
+        if self.get_meta("key") != key:
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("DELETE FROM meta")
+            self.set_meta("key", key)
+            self.conn.commit()
+
+    def __enter__(self) -> "CorpusIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get_meta(self, key: str):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else marshal.loads(row[0])
+
+    def set_meta(self, key: str, value) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, marshal.dumps(value))
+        )
+
+    def get_word_counts(self) -> WordCounts:
+        """The aggregate counts, as of the last update"""
+        return self.get_meta("searched") or 0, Counter(self.get_meta("counts") or {})
+
+    def update(self, paths: Iterable[str], jobs: int = 1) -> WordCounts:
+        """
+        Bring the counts up to date with the files at `paths` (i.e., the whole
+        corpus: any other file counted before is removed), returning the
+        aggregate counts
+        """
+        known: Dict[str, Tuple[int, int]] = {
+            path: (mtime_ns, size)
+            for path, mtime_ns, size in self.conn.execute(
+                "SELECT path, mtime_ns, size FROM files"
+            )
+        }
+
+        changed: Dict[str, Tuple[int, int]] = {}
+        for f in paths:
+            try:
+                st = os.stat(f)
+            except OSError:
+                continue
+
+            if known.pop(f, None) != (st.st_mtime_ns, st.st_size):
+                changed[f] = (st.st_mtime_ns, st.st_size)
+
+        # Whatever is left in `known` was removed from the corpus
+        stale = list(known) + list(changed)
+        if not stale:
+            return self.get_word_counts()
+
+        searched, word_counter = self.get_word_counts()
+
+        for f in stale:
+            row = self.conn.execute(
+                "SELECT searched, counts FROM files WHERE path = ?", (f,)
+            ).fetchone()
+            if row is not None:
+                searched -= row[0]
+                subtract_counts(word_counter, marshal.loads(row[1]))
+
+        self.conn.executemany("DELETE FROM files WHERE path = ?", [(f,) for f in known])
+
+        for f, (file_searched, file_counter) in count_each_file(
+            changed, jobs, max_word_len=self.max_word_len
+        ):
+            searched += file_searched
+            word_counter.update(file_counter)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                (f, *changed[f], file_searched, marshal.dumps(dict(file_counter))),
+            )
+
+        self.set_meta("searched", searched)
+        self.set_meta("counts", dict(word_counter))
+
+        # Per-file and aggregate counts are only ever updated together
+        self.conn.commit()
+
+        return searched, word_counter
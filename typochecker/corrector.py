@@ -1,44 +1,95 @@
 import argparse
+import atexit
 import fileinput
+import io
 import os
-import re
-from typing import Any, Dict, List, Optional, Pattern, Tuple
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+from typochecker.decisions import (
+    DecisionStore,
+    RememberingResponse,
+    get_default_decisions_loc,
+)
+from typochecker.edits import (
+    Edit,
+    apply_edits,
+    apply_line_edits,
+    write_atomically,
+)
+from typochecker.filetypes import get_name_skip_reason, read_text
+from typochecker.git_source import iter_diff_typos, iter_index_typos
+from typochecker.matcher import TypoMatcher
+from typochecker.prefetch import prefetch
+from typochecker.report import write_occurrences, write_report
+from typochecker.scan_cache import ScanCache, get_default_scan_cache_loc
+from typochecker.scanner import (  # noqa: F401
+    FileScan,
+    get_typos_in_file,
+    get_typos_in_string,
+    scan_files,
+)
+from typochecker.stats import Stats, TimedResponse
 from typochecker.suggestion_response import (
     AlwaysRespondIgnore,
     Ignore,
     Keep,
     Quit,
+    RecordingResponse,
+    ReplayResponse,
     Response,
     SuggestionResponse,
     Unknown,
 )
+from typochecker.typo_index import TypoIndex, match_case
+from typochecker.typo_table import get_whitelist_words, load_typos
 from typochecker.user_input import UserResponse
-from typochecker.utils import get_visible_subdirs, parse_typos_file
+from typochecker.utils import iter_visible_files
 
-# Assumption: long lines (e.g., in JSON files) should be skipped
-MAX_LINE_LEN = 200
+# Long lines (e.g., prose without line breaks) are shown as a window of
+# about this many characters around the typo
+DISPLAY_WIDTH = 200
+ELLIPSIS = "..."
 
+# (mtime_ns, size, lines, encoding) of files read ahead of their review,
+# by path
+ReadAhead = Dict[str, Tuple[int, int, List[str], str]]
 
-def get_typos_in_string(s: str, known_typos: Dict[str, str]) -> List:
-    """
-    >>> get_typos_in_string('foo buzz', {'foo': 'bar', 'bazz': 'buzz'})
-    ['foo']
 
-    >>> get_typos_in_string('foo bazz', {'foo': 'bar', 'bazz': 'buzz'})
-    ['bazz', 'foo']
+def get_excerpt(
+    line: str, span: Tuple[int, int], width: int = DISPLAY_WIDTH
+) -> Tuple[str, Tuple[int, int]]:
     """
-    words = re.findall(r"[\w]+", s)
-    uniq_words = set(words)
-
-    return sorted([w for w in uniq_words if w.lower() in known_typos])
+    About `width` characters of `line` around `span`, cut between words
+    (with "..." marking each cut); returns the excerpt and the span within it
 
-
-def get_typos_in_file(f: str, known_typos: Dict[str, str]) -> List:
-    with open(f, "r") as ff:
-        lines = ff.readlines()
-
-    return get_typos_in_string(" ".join(lines), known_typos)
+    >>> get_excerpt('one two tpyo three four', (8, 12), 12)
+    ('...two tpyo...', (7, 11))
+    >>> get_excerpt('a tpyo', (2, 6), 12)
+    ('a tpyo', (2, 6))
+    """
+    if len(line) <= width:
+        return line, span
+
+    margin = max(0, width - (span[1] - span[0])) // 2
+    start = max(0, span[0] - margin)
+    end = min(len(line), span[1] + margin)
+
+    # Move each cut towards the typo until it falls between words (at most
+    # `margin` characters, so the cost is bounded by the width)
+    while 0 < start < span[0] and line[start - 1].isalnum():
+        start += 1
+    while span[1] < end < len(line) and line[end].isalnum():
+        end -= 1
+
+    prefix = ELLIPSIS if start > 0 else ""
+    suffix = ELLIPSIS if end < len(line) else ""
+    shift = len(prefix) - start
+
+    return (
+        prefix + line[start:end] + suffix,
+        (span[0] + shift, span[1] + shift),
+    )
 
 
 def get_fix(
@@ -48,9 +99,10 @@ def get_fix(
     orig: str,
     responder: SuggestionResponse,
 ) -> Response:
+    line, typo_span = get_excerpt(line, typo_span)
     print(line)
 
-    cnt = typo_span[1] - typo_span[0] + 1
+    cnt = typo_span[1] - typo_span[0]
 
     # assume tab <=> 4 spaces, to align '^'s with text
     ws_cnt = sum(4 if c == "\t" else 1 for c in line[: typo_span[0]])
@@ -68,98 +120,124 @@ def get_fix(
         return get_fix(line, typo_span, suggestion, orig, responder)
 
 
-def get_fixed_line(line, matched_typo, fix):
-    """
-    >>> get_fixed_line('There isss a typo', 'isss', 'is')
-    'There is a typo'
-
-    >>> get_fixed_line('There is a tpyo', 'tpyo', 'typo')
-    'There is a typo'
-
-    >>> get_fixed_line('Theer is a typo', 'Theer', 'There')
-    'There is a typo'
-    """
-    if re.search(r"^" + matched_typo + r"(\W)", line):
-        return re.sub(r"^" + matched_typo + r"(\W)", fix + r"\1", line, count=1)
-    elif re.search(r"(\W)" + matched_typo + r"$", line):
-        return re.sub(r"(\W)" + matched_typo + r"$", r"\1" + fix, line, count=1)
-    elif re.search(r"(\W)" + matched_typo + r"(\W)", line):
-        return re.sub(
-            r"(\W)" + matched_typo + r"(\W)", r"\1" + fix + r"\2", line, count=1
-        )
-
-    return line
-
-
-def iterate_over_lines(
+def plan_edits(
     raw_lines: List[str],
     all_typos: Dict[str, str],
     found_typos: List[str],
     responder: SuggestionResponse,
-) -> Tuple[List[str], bool]:
-    has_rewrites = False
-
-    all_lines = []
-
-    def get_regex(typos: List[str]) -> Pattern:
-        return re.compile("|".join(r"\W" + found_typo + r"\W" for found_typo in typos))
+) -> Union[List[Edit], Quit]:
+    """
+    Ask about each typo in turn, recording the accepted fixes as edits
+    against `raw_lines` (which are left as is); Quit abandons every edit
+    """
+    edits: List[Edit] = []
 
-    re_pat = get_regex(found_typos)
+    matcher = TypoMatcher(found_typos)
 
-    for raw_line in raw_lines:
-        line = raw_line
+    for line_no, raw_line in enumerate(raw_lines):
+        if not matcher:
+            continue
 
-        m = re_pat.search(line)
+        # Edits to this line so far, and the change in length they make
+        line_edits: List[Edit] = []
+        offset = 0
 
-        while found_typos and m and (len(line) < MAX_LINE_LEN):
-            matched_typo = re.sub("[^a-zA-Z]+", "", m.group())
+        for start, end, matched_typo in matcher.finditer(raw_line):
+            line = apply_line_edits(raw_line, line_edits)
 
-            if matched_typo not in all_typos and matched_typo.lower() not in all_typos:
+            if matched_typo.lower() not in all_typos:
                 fix = Ignore(matched_typo)
             else:
                 fix = get_fix(
                     line,
-                    m.span(),
-                    all_typos.get(matched_typo, None)
-                    or all_typos[matched_typo.lower()],
+                    (start + offset, end + offset),
+                    match_case(matched_typo, all_typos[matched_typo.lower()]),
                     matched_typo,
                     responder,
                 )
 
             if isinstance(fix, Quit):
                 # This will abandon any work so far on the file/lines
-                return raw_lines, False
+                return fix
             elif isinstance(fix, Keep):
                 # If skip the fix, assume rest of line is acceptable
                 break
             elif isinstance(fix, Ignore):
                 to_ignore = fix.word
-                found_typos = [t for t in found_typos if t != to_ignore]
 
                 # Don't look for this "typo" in the future
-                all_typos.pop(to_ignore, None)
+                # (typos are keyed by lowercase, so this covers every casing)
+                matcher.ignore(to_ignore)
                 all_typos.pop(to_ignore.lower(), None)
-                all_typos.pop(to_ignore.title(), None)
-                all_typos.pop(to_ignore.upper(), None)
-
-                re_pat = get_regex(found_typos)
-                m = re_pat.search(line)
 
                 continue
 
-            has_rewrites = True
+            line_edits.append(Edit(line_no, start, end, fix.word))
+            before, _ = get_excerpt(line, (start + offset, end + offset))
+            after, _ = get_excerpt(
+                apply_line_edits(raw_line, line_edits),
+                (start + offset, start + offset + len(fix.word)),
+            )
+            offset += len(fix.word) - (end - start)
 
-            fix = fix.word
+            print("Before: {}".format(before))
+            print("After:  {}".format(after))
 
-            print("Before: {}".format(line))
-            line = get_fixed_line(line, matched_typo, fix)
+        edits.extend(line_edits)
 
-            print("After:  {}".format(line))
-            m = re_pat.search(line)
+    return edits
 
-        all_lines.append(line)
 
-    return all_lines, has_rewrites
+def iterate_over_lines(
+    raw_lines: List[str],
+    all_typos: Dict[str, str],
+    found_typos: List[str],
+    responder: SuggestionResponse,
+) -> Tuple[List[str], bool]:
+    edits = plan_edits(raw_lines, all_typos, found_typos, responder)
+
+    if isinstance(edits, Quit) or not edits:
+        return raw_lines, False
+
+    return apply_edits(raw_lines, edits), True
+
+
+def read_lines(f: str) -> Tuple[List[str], str]:
+    """The lines of `f`, with their line endings as they are, and its encoding"""
+    text, encoding = read_text(f)
+    return io.StringIO(text, newline="").readlines(), encoding
+
+
+def read_ahead_scans(
+    scans: Iterable[FileScan], read_ahead: ReadAhead
+) -> Iterator[FileScan]:
+    """
+    Read each file with typos as soon as it is scanned (e.g., in the
+    background, while the previous file is reviewed), so that its review
+    does not wait on the disk
+    """
+    for scan in scans:
+        if scan.typos:
+            try:
+                st = os.stat(scan.path)
+                lines, encoding = read_lines(scan.path)
+                read_ahead[scan.path] = (st.st_mtime_ns, st.st_size, lines, encoding)
+            except OSError:
+                # Reported if the file is reviewed
+                pass
+
+        yield scan
+
+
+def get_lines(f: str, read_ahead: Optional[ReadAhead] = None) -> Tuple[List[str], str]:
+    """The lines of `f` (see read_lines), as read ahead, unless it has changed"""
+    entry = read_ahead.pop(f, None) if read_ahead is not None else None
+    if entry is not None:
+        st = os.stat(f)
+        if entry[:2] == (st.st_mtime_ns, st.st_size):
+            return entry[2], entry[3]
+
+    return read_lines(f)
 
 
 def iterate_over_file(
@@ -167,21 +245,117 @@ def iterate_over_file(
     all_typos: Dict[str, str],
     found_typos: List[str],
     responder: SuggestionResponse,
-) -> Optional[Any]:
-    with open(f, "r") as fname:
-        raw_lines = fname.readlines()
+    read_ahead: Optional[ReadAhead] = None,
+) -> Optional[Quit]:
+    raw_lines, encoding = get_lines(f, read_ahead)
+
+    edits = plan_edits(raw_lines, all_typos, found_typos, responder)
+
+    if isinstance(edits, Quit):
+        return edits
+
+    if edits:
+        # Written back in the encoding it was read in
+        write_atomically(f, "".join(apply_edits(raw_lines, edits)), encoding)
+
+    return None
+
+
+def review_scans(
+    scans: Iterable[FileScan],
+    all_typos: Dict[str, str],
+    responder: SuggestionResponse,
+    read_ahead: Optional[ReadAhead] = None,
+) -> None:
+    """
+    Interactively fix the typos found in each scanned file, in turn; files
+    in `read_ahead` (see read_ahead_scans) are not read again
+    """
+    for scan in scans:
+        # Skip typos that were ignored since the file was scanned
+        file_typos = [t for t in scan.typos if t.lower() in all_typos]
+        if not file_typos and read_ahead is not None:
+            read_ahead.pop(scan.path, None)
+
+        try:
+            if file_typos:
+                print("Suggestions follow for file {}".format(scan.path))
+                print("file_typos: {}".format(file_typos))
+                res = iterate_over_file(
+                    scan.path, all_typos, file_typos, responder, read_ahead
+                )
+
+                if isinstance(res, Quit):
+                    break
+
+        except OSError:
+            pass
+
+        except UnicodeEncodeError:
+            # A fix that the file's encoding (e.g., Latin-1) cannot represent
+            print("### Experienced an error with file {}".format(scan.path))
+
+        except EOFError:
+            pass
+
+
+def iter_git_typos(
+    args: argparse.Namespace, typos: TypoIndex
+) -> Iterator[Tuple[str, int, int, str]]:
+    """Typos in the staged files (--index), or in changed lines"""
+    if not args.index:
+        yield from iter_diff_typos(["--cached"] if args.staged else [args.diff], typos)
+        return
+
+    # Blobs already scanned (e.g., by the last pre-commit run) are not read again
+    cache = None
+    if not args.no_cache:
+        cache = ScanCache(get_default_scan_cache_loc(), typos.version)
+
+    try:
+        yield from iter_index_typos(typos, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def asks_a_person(args: argparse.Namespace) -> bool:
+    """Whether typos are answered at prompts (rather than reported or replayed)"""
+    return not (args.report or args.ignore_all or args.replay_session)
 
-    all_lines, has_rewrites = iterate_over_lines(
-        raw_lines, all_typos, found_typos, responder
+
+def open_decisions(
+    args: argparse.Namespace, typos: Dict[str, str]
+) -> Optional[DecisionStore]:
+    """
+    The answers a person gave in earlier runs; words ignored in them are
+    dropped. Reports and replayed sessions do not depend on them.
+    """
+    if args.no_decisions or not asks_a_person(args):
+        return None
+
+    decisions = DecisionStore(
+        args.decisions or get_default_decisions_loc(args.dir or os.getcwd())
     )
+    for word in decisions.get_ignored():
+        typos.pop(word, None)
+
+    return decisions
 
-    if isinstance(all_lines, Quit):
-        return all_lines
 
-    if has_rewrites:
-        with open(f, "w") as fname:
-            sep = ""  # Original lines already have line-ending
-            fname.write(sep.join(all_lines))
+def get_responder(
+    args: argparse.Namespace, decisions: Optional[DecisionStore] = None
+) -> SuggestionResponse:
+    if args.ignore_all:
+        return AlwaysRespondIgnore()
+    elif args.replay_session:
+        return ReplayResponse.from_file(args.replay_session)
+
+    # Only a person's answers are remembered (so each is only asked once)
+    if decisions is not None:
+        return RememberingResponse(UserResponse(), decisions)
+
+    return UserResponse()
 
 
 if __name__ == "__main__":
@@ -206,100 +380,207 @@ if __name__ == "__main__":
         action="store_true",
         help="Ignore all suggestions (useful for debugging)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes to scan files with (0 for one per core)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Rescan every file, rather than reusing results for unchanged files",
+    )
+    parser.add_argument(
+        "--diff",
+        metavar="REV_RANGE",
+        help="Only check lines added/modified by `git diff REV_RANGE` "
+        "(e.g., main...HEAD); implies --report",
+    )
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="Only check lines added/modified by staged changes; implies --report",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Check the whole staged version of every file (i.e., as it would "
+        "be committed), read in bulk from Git; implies --report",
+    )
+    parser.add_argument(
+        "--report",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="Do not prompt; write each typo found as a JSON line to FILE "
+        "(default: stdout), and exit with status 1 if any were found",
+    )
 
-    args = parser.parse_args()
-
-    if not args.dir:
-        all_files = [f.strip() for f in fileinput.input()]
-    else:
-        all_files = get_visible_subdirs(args.dir)
-
-    # By default, use typos gathered at
-    # https://en.wikipedia.org/wiki/Wikipedia:Lists_of_common_misspellings/For_machines
-    TYPOS_LOC = os.path.join(
-        os.path.dirname(__file__),
-        os.pardir,
-        "data",
-        "wikipedia_common_misspellings.txt",
+    parser.add_argument(
+        "--record-session",
+        metavar="FILE",
+        help="Record each response to FILE, so that the session can be replayed",
     )
-    EXTRA_TYPOS_LOC = os.path.join(
-        os.path.dirname(__file__), os.pardir, "data", "extra_endings.txt"
+    parser.add_argument(
+        "--replay-session",
+        metavar="FILE",
+        help="Respond as recorded (with --record-session) in FILE, rather than "
+        "prompting (e.g., to benchmark a whole session)",
     )
 
-    print("Getting list of typos")
-    typo_src = "https://en.wikipedia.org/wiki/Wikipedia:Lists_of_common_misspellings/For_machines"
-    print("Information from {}".format(typo_src))
-    typos = {}
-    for fs in [TYPOS_LOC, EXTRA_TYPOS_LOC]:
-        typos.update(parse_typos_file(fs))
+    parser.add_argument(
+        "--decisions",
+        metavar="FILE",
+        help="Remember answers to prompts in FILE, and answer the same prompts "
+        "the same way in later runs (default: one file per directory checked, "
+        "in the cache directory)",
+    )
+    parser.add_argument(
+        "--no-decisions",
+        action="store_true",
+        help="Neither reuse nor remember answers from earlier runs",
+    )
 
-    # Remove whitelisted words from typos
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=8,
+        metavar="K",
+        help="While prompting, scan and read up to K upcoming files in the "
+        "background (0 to disable)",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print where the time went (per phase, and the slowest files) at exit",
+    )
+    parser.add_argument(
+        "--stats-json",
+        metavar="FILE",
+        help="Also write those statistics, as JSON, to FILE",
+    )
 
-    for word in args.whitelist_word or []:
-        del typos[word.lower()]
+    args = parser.parse_args()
 
-    for whitelist_file in args.whitelist_file or []:
-        try:
-            with open(whitelist_file, "r") as ff:
-                lines = ff.readlines()
+    # Only timed (and costs per file only measured) with --stats
+    stats = Stats(enabled=bool(args.stats or args.stats_json))
+    if stats.enabled:
+        atexit.register(stats.report, sys.stderr, args.stats_json)
 
-        except OSError:
-            print(
-                "Encountered problem while trying to trying to read whitelist file {}".format(
-                    whitelist_file
-                )
-            )
+    if (args.diff or args.staged or args.index) and not args.report:
+        args.report = "-"
 
-        words = re.findall(r"[\w]+", " ".join(lines))
+    report_out = sys.stdout
+    if args.report == "-":
+        # Keep stdout for the report; progress messages go to stderr instead
+        sys.stdout = sys.stderr
+    elif args.report:
+        report_out = open(args.report, "w")
 
-        for word in words:
-            del typos[word.lower()]
+    print("Getting list of typos")
+    typo_src = "https://en.wikipedia.org/wiki/Wikipedia:Lists_of_common_misspellings/For_machines"
+    print("Information from {}".format(typo_src))
 
-    # Remove some case sensitivity
-    titled_typos = {k.title(): v.title() for k, v in typos.items()}
-    typos.update(titled_typos)
-    upper_typos = {k.upper(): v.upper() for k, v in typos.items()}
-    typos.update(upper_typos)
+    # Whitelisted words are removed from the (cached) compiled typos
+    whitelist = get_whitelist_words(args.whitelist_word, args.whitelist_file)
+    with stats.phase("load_typos"):
+        typos = load_typos(whitelist=whitelist)
 
-    file_beginnings_to_ignore = ["LICENSE"]
-    file_endings_to_ignore = ["~", ".exe", ".gz", ".jar", ".pdf", ".xml", ".zip"]
+    if args.diff or args.staged or args.index:
+        # Contents come from Git, so no files need to be searched
+        with stats.phase("diff"):
+            typo_cnt = write_occurrences(iter_git_typos(args, typos), typos, report_out)
+        report_out.close()
 
-    print("Will search through {} files".format(len(all_files)))
+        print(
+            "Found {} typos in {}".format(
+                typo_cnt, "staged files" if args.index else "changed lines"
+            )
+        )
+        sys.exit(1 if typo_cnt else 0)
 
-    if args.ignore_all:
-        responder = AlwaysRespondIgnore()
+    # Files are found lazily, as they are searched (unless prompts need stdin)
+    if not args.dir:
+        # (e.g., piped from `git ls-files`)
+        all_files = (f.strip() for f in fileinput.input(files=("-",)) if f.strip())
+        if not args.report:
+            # Prompts also read stdin, so the list must be used up first (or
+            # the names still to come would be taken as answers)
+            all_files = list(all_files)
     else:
-        responder = UserResponse()
+        all_files = iter_visible_files(args.dir)
+    all_files = stats.timed_iter("walk", all_files)
 
-    for search_file in all_files:
-        if any([search_file.endswith(e) for e in file_endings_to_ignore]):
-            continue
+    print("Will search through files in {}".format(args.dir or "stdin"))
 
-        if any(
-            [
-                search_file.split(os.sep)[-1].startswith(e)
-                for e in file_beginnings_to_ignore
-            ]
-        ):
-            continue
-
-        try:
-            # print('Searching file: {}'.format(search_file))
-            file_typos = get_typos_in_file(search_file, typos)
-
-            if file_typos:
-                print("Suggestions follow for file {}".format(search_file))
-                print("file_typos: {}".format(file_typos))
-                res = iterate_over_file(search_file, typos, file_typos, responder)
+    def get_files_to_search():
+        # Files are also sniffed (e.g., for binary content) when scanned
+        for search_file in all_files:
+            reason = get_name_skip_reason(search_file)
+            if reason:
+                stats.count("files_skipped.{}".format(reason))
+            else:
+                yield search_file
 
-                if isinstance(res, Quit):
-                    break
+    # Files are scanned (and their results cached) against the whole table;
+    # words ignored, in earlier runs or at prompts, only leave the review's
+    review_typos = TypoIndex.from_folded(typos)
+    decisions = open_decisions(args, review_typos)
 
-        except OSError:
-            pass
+    # Results for files that are unchanged since they were last scanned are reused
+    if args.no_cache:
+        scan_cache = None
+    else:
+        scan_cache = ScanCache(get_default_scan_cache_loc(), typos.version)
+
+    scans = scan_files(
+        get_files_to_search(),
+        typos,
+        jobs=args.jobs,
+        cache=scan_cache,
+        stats=stats if stats.enabled else None,
+    )
 
-        except UnicodeDecodeError:
-            print("### Experienced an error with file {}".format(search_file))
+    if args.report:
+        with stats.phase("report"):
+            typo_cnt = write_report(stats.timed_iter("scan", scans), typos, report_out)
+        report_out.close()
+    else:
+        responder = get_responder(args, decisions)
+        recording = RecordingResponse(responder) if args.record_session else None
+        reviewer: SuggestionResponse = recording or responder
+        if stats.enabled:
+            reviewer = TimedResponse(reviewer, stats)
+
+        # Detection runs ahead (across `--jobs` processes, and in the
+        # background while prompting) of the interactive review, which sees
+        # the files in their original order
+        read_ahead: ReadAhead = {}
+        prefetched = prefetch(read_ahead_scans(scans, read_ahead), args.prefetch)
 
-        except EOFError:
-            pass
+        try:
+            with stats.phase("review"):
+                review_scans(
+                    stats.timed_iter("scan", prefetched),
+                    review_typos,
+                    reviewer,
+                    read_ahead,
+                )
+        finally:
+            # Stop scanning ahead (e.g., after quitting) before the cache is closed
+            prefetched.close()
+            if recording is not None:
+                recording.save(args.record_session)
+
+    if scan_cache is not None:
+        stats.count("files_cached", scan_cache.hits)
+        scan_cache.close()
+    if decisions is not None:
+        stats.count("responses.remembered", decisions.hits)
+        decisions.close()
+
+    if args.report:
+        print("Found {} typos".format(typo_cnt))
+        sys.exit(1 if typo_cnt else 0)
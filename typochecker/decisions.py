@@ -0,0 +1,147 @@
+import hashlib
+import os
+import sqlite3
+from typing import Optional, Set
+
+from typochecker.suggestion_response import (
+    Ignore,
+    Keep,
+    Literal,
+    Response,
+    SuggestionResponse,
+)
+from typochecker.utils import get_cache_dir
+
+# Ignoring a word, or replacing it, holds wherever the same typo (and
+# suggestion) comes up; keeping it only holds for the same line
+ANYWHERE = ""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    typo TEXT NOT NULL,
+    suggestion TEXT NOT NULL,
+    context TEXT NOT NULL,
+    response TEXT NOT NULL,
+    word TEXT,
+    PRIMARY KEY (typo, suggestion, context)
+);
+"""
+
+
+def get_default_decisions_loc(root: str) -> str:
+    """One store per directory checked"""
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8", "surrogateescape"))
+    return os.path.join(
+        get_cache_dir(), "decisions-{}.sqlite3".format(digest.hexdigest())
+    )
+
+
+def get_context_key(line: str) -> str:
+    """
+    Identify the line a typo was found in (ignoring indentation), so that
+    keeping a typo applies to that line in later runs, and no other
+
+    >>> get_context_key('  a tpyo\\n') == get_context_key('a tpyo')
+    True
+    """
+    return hashlib.sha1(line.strip().encode("utf-8", "surrogateescape")).hexdigest()
+
+
+class DecisionStore(object):
+    """
+    On-disk answers to prompts, keyed by (typo, suggestion, context), where
+    the context is either a line (see get_context_key) or ANYWHERE
+    """
+
+    def __init__(self, loc: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(loc)), exist_ok=True)
+        self.conn = sqlite3.connect(loc, timeout=30)
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+
+    def __enter__(self) -> "DecisionStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def get(self, typo: str, suggestion: str, line: str) -> Optional[Response]:
+        """The answer given before for this typo, in this line or anywhere"""
+        row = self.conn.execute(
+            "SELECT response, word FROM decisions "
+            "WHERE typo = ? AND suggestion = ? AND context IN (?, ?) "
+            "ORDER BY context = ? LIMIT 1",
+            (typo, suggestion, get_context_key(line), ANYWHERE, ANYWHERE),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        self.hits += 1
+        if row[0] == "Keep":
+            return Keep()
+        elif row[0] == "Ignore":
+            return Ignore(typo)
+
+        return Literal(row[1])
+
+    def put(self, typo: str, suggestion: str, line: str, response: Response) -> None:
+        """Remember an answer (other than quitting, which is not a decision)"""
+        if isinstance(response, Keep):
+            context = get_context_key(line)
+        elif isinstance(response, (Ignore, Literal)):
+            context = ANYWHERE
+        else:
+            return
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO decisions VALUES (?, ?, ?, ?, ?)",
+            (
+                typo,
+                suggestion,
+                context,
+                type(response).__name__,
+                getattr(response, "word", None),
+            ),
+        )
+        # Answers are kept even if the run is interrupted
+        self.conn.commit()
+
+    def get_ignored(self) -> Set[str]:
+        """Words ignored in earlier runs, which need not be looked for at all"""
+        return {
+            row[0]
+            for row in self.conn.execute(
+                "SELECT typo FROM decisions WHERE response = 'Ignore'"
+            )
+        }
+
+
+class RememberingResponse(SuggestionResponse):
+    """
+    Answer prompts that were answered before (in this run or an earlier
+    one) as they were; pass the rest on to another responder (e.g., the
+    user), and remember its answers
+    """
+
+    def __init__(self, responder: SuggestionResponse, store: DecisionStore) -> None:
+        super().__init__()
+        self.responder = responder
+        self.store = store
+
+    def get_response(self, line, typo_span, suggestion, orig, prompt):
+        response = self.store.get(orig, suggestion, line)
+        if response is not None:
+            print("Answered as before: {}".format(type(response).__name__))
+            return response
+
+        response = self.responder.get_response(
+            line, typo_span, suggestion, orig, prompt
+        )
+        self.store.put(orig, suggestion, line, response)
+
+        return response
@@ -0,0 +1,74 @@
+import os
+import stat
+import tempfile
+from itertools import groupby
+from typing import Iterable, List, NamedTuple
+
+
+class Edit(NamedTuple):
+    """Replace `line[start:end]` (against the original text) with `replacement`"""
+
+    line: int  # 0-based
+    start: int
+    end: int
+    replacement: str
+
+
+def apply_line_edits(line: str, edits: Iterable[Edit]) -> str:
+    """
+    Apply non-overlapping edits to a single line, in one pass
+
+    >>> apply_line_edits('Teh tpyo', [Edit(0, 4, 8, 'typo'), Edit(0, 0, 3, 'The')])
+    'The typo'
+    """
+    fixed = []
+    pos = 0
+
+    for edit in sorted(edits, key=lambda e: e.start):
+        fixed.append(line[pos : edit.start])
+        fixed.append(edit.replacement)
+        pos = edit.end
+
+    fixed.append(line[pos:])
+
+    return "".join(fixed)
+
+
+def apply_edits(lines: List[str], edits: Iterable[Edit]) -> List[str]:
+    """
+    >>> apply_edits(['a tpyo\\n', 'ok\\n', 'teh end\\n'],
+    ...             [Edit(0, 2, 6, 'typo'), Edit(2, 0, 3, 'the')])
+    ['a typo\\n', 'ok\\n', 'the end\\n']
+    """
+    fixed = list(lines)
+
+    for line_no, line_edits in groupby(
+        sorted(edits, key=lambda e: e.line), key=lambda e: e.line
+    ):
+        fixed[line_no] = apply_line_edits(lines[line_no], line_edits)
+
+    return fixed
+
+
+def write_atomically(f: str, text: str, encoding: str = "utf-8") -> None:
+    """
+    Replace the contents of `f` in a single step (through a temporary file
+    in the same directory), keeping its permissions; an interrupted write
+    (or one that `encoding` cannot represent) leaves the original untouched.
+    Line endings are written as given.
+    """
+    # Replace the target of a symlink, rather than the link itself
+    f = os.path.realpath(f)
+    mode = stat.S_IMODE(os.stat(f).st_mode)
+
+    fd, tmp_loc = tempfile.mkstemp(
+        dir=os.path.dirname(f), prefix=".{}.".format(os.path.basename(f))
+    )
+    try:
+        with os.fdopen(fd, "w", encoding=encoding, newline="") as tmp:
+            tmp.write(text)
+        os.chmod(tmp_loc, mode)
+        os.replace(tmp_loc, f)
+    except BaseException:
+        os.unlink(tmp_loc)
+        raise
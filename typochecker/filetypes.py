@@ -0,0 +1,139 @@
+import os
+import re
+from typing import Optional, Tuple
+
+# How much of a file is read to decide whether it is worth checking
+SNIFF_SIZE = 8192
+
+# Text is decoded as UTF-8 where it can be, otherwise as Latin-1 (which
+# decodes any bytes, so legacy files are still checked, and written back
+# unchanged apart from the fixes)
+ENCODING = "utf-8"
+FALLBACK_ENCODING = "latin-1"
+
+# Files whose names alone say they should not be checked
+FILE_BEGINNINGS_TO_IGNORE = ("LICENSE",)
+FILE_ENDINGS_TO_IGNORE = ("~", ".xml")
+MINIFIED_ENDINGS = (".min.js", ".min.css", ".map")
+LOCKFILE_NAMES = frozenset(
+    [
+        "Pipfile.lock",
+        "package-lock.json",
+        "npm-shrinkwrap.json",
+        "pnpm-lock.yaml",
+        "go.sum",
+    ]
+)
+
+# Some control characters do appear in text files
+TEXT_CONTROL_BYTES = b"\b\t\n\f\r\x1b"
+NON_TEXT_BYTES = bytes(b for b in range(32) if b not in TEXT_CONTROL_BYTES) + bytes(
+    [127]
+)
+
+# Above this fraction of non-text bytes, a file is considered binary
+MAX_NON_TEXT_RATIO = 0.3
+
+# Minified code has very long lines with (relatively) little whitespace
+MINIFIED_LINE_LEN = 2000
+MAX_MINIFIED_WHITESPACE_RATIO = 0.1
+
+# Generated files say so in their first few lines
+GENERATED_MARKER_RE = re.compile(rb"@generated|DO NOT EDIT|[Aa]uto-?generated")
+GENERATED_MARKER_LINES = 5
+
+
+def get_name_skip_reason(path: str) -> Optional[str]:
+    """
+    Reason to skip `path` based on its name alone, without touching the file
+
+    >>> get_name_skip_reason('a/LICENSE.txt'), get_name_skip_reason('a/yarn.lock')
+    ('license', 'lockfile')
+    >>> get_name_skip_reason('a/app.min.js'), get_name_skip_reason('a/main.py')
+    ('minified', None)
+    """
+    name = os.path.basename(path)
+
+    if name.startswith(FILE_BEGINNINGS_TO_IGNORE):
+        return "license"
+    if name in LOCKFILE_NAMES or name.endswith(".lock"):
+        return "lockfile"
+    if name.endswith(MINIFIED_ENDINGS):
+        return "minified"
+    if name.endswith(FILE_ENDINGS_TO_IGNORE):
+        return "ignored-name"
+
+    return None
+
+
+def get_content_skip_reason(head: bytes) -> Optional[str]:
+    """
+    Reason to skip a file, based on the first `SNIFF_SIZE` bytes of it
+
+    >>> get_content_skip_reason(b'PK\\x03\\x04\\x14\\x00\\x00\\x00')
+    'binary'
+    >>> get_content_skip_reason(b'# @generated by protoc\\nimport x\\n')
+    'generated'
+    >>> get_content_skip_reason(b'a=f(b,c);' * 300)
+    'minified'
+    >>> get_content_skip_reason('Plain text, caf\\u00e9\\n'.encode()) is None
+    True
+    """
+    if not head:
+        return None
+
+    if b"\0" in head:
+        return "binary"
+
+    non_text = len(head) - len(head.translate(None, NON_TEXT_BYTES))
+    if non_text > MAX_NON_TEXT_RATIO * len(head):
+        return "binary"
+
+    header = b"\n".join(head.split(b"\n")[:GENERATED_MARKER_LINES])
+    if GENERATED_MARKER_RE.search(header):
+        return "generated"
+
+    for line in head.split(b"\n"):
+        if len(line) >= MINIFIED_LINE_LEN:
+            whitespace = line.count(b" ") + line.count(b"\t")
+            if whitespace < MAX_MINIFIED_WHITESPACE_RATIO * len(line):
+                return "minified"
+
+    return None
+
+
+def get_skip_reason(path: str) -> Optional[str]:
+    """
+    Reason not to check `path` (e.g., "binary"), or None if it should be
+    checked; costs at most one small read, and no decoding
+    """
+    reason = get_name_skip_reason(path)
+    if reason:
+        return reason
+
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_SIZE)
+
+    return get_content_skip_reason(head)
+
+
+def decode_text(data: bytes) -> Tuple[str, str]:
+    """
+    Decode the contents of a file; returns the text and the encoding used,
+    which encodes the text back to the same bytes
+
+    >>> decode_text('café'.encode('utf-8'))
+    ('café', 'utf-8')
+    >>> decode_text('café'.encode('latin-1'))
+    ('café', 'latin-1')
+    """
+    try:
+        return data.decode(ENCODING), ENCODING
+    except UnicodeDecodeError:
+        return data.decode(FALLBACK_ENCODING), FALLBACK_ENCODING
+
+
+def read_text(path: str) -> Tuple[str, str]:
+    """The text of `path` and its encoding (see decode_text)"""
+    with open(path, "rb") as f:
+        return decode_text(f.read())
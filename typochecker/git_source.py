@@ -0,0 +1,432 @@
+import os
+import re
+import subprocess
+import threading
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from typochecker.filetypes import (
+    SNIFF_SIZE,
+    decode_text,
+    get_content_skip_reason,
+    get_name_skip_reason,
+)
+from typochecker.matcher import WORD_RE
+from typochecker.scanner import (
+    FileScan,
+    get_words_in_bytes,
+    iter_typo_occurrences,
+)
+
+if TYPE_CHECKING:
+    from typochecker.scan_cache import ScanCache
+
+# Git's name for "not in the object database" (e.g., a working tree file)
+NULL_SHA = "0" * 40
+
+# Index entries that are not regular files: symlinks and submodules
+NON_FILE_MODES = ("120000", "160000")
+
+# Escapes (other than octal, for bytes) in names quoted by git
+C_ESCAPES = {
+    b"a": b"\a",
+    b"b": b"\b",
+    b"f": b"\f",
+    b"n": b"\n",
+    b"r": b"\r",
+    b"t": b"\t",
+    b"v": b"\v",
+}
+
+HUNK_HEADER_RE = re.compile(rb"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+class ChangedFile(NamedTuple):
+    path: str
+    blob: Optional[str]  # None if the new version is only in the working tree
+    added_lines: Set[int]
+
+
+def run_git(args: List[str], cwd: Optional[str] = None) -> bytes:
+    # Keep non-ASCII paths unquoted in the output
+    return subprocess.check_output(
+        ["git", "-c", "core.quotePath=false"] + args, cwd=cwd
+    )
+
+
+def get_repo_root(cwd: Optional[str] = None) -> str:
+    """
+    The top of the working tree: paths from git are relative to it, whichever
+    subdirectory it is run in
+    """
+    root = run_git(["rev-parse", "--show-toplevel"], cwd)
+    return root.rstrip(b"\n").decode("utf-8", "surrogateescape")
+
+
+class CatFile(object):
+    """
+    A single, long-lived `git cat-file --batch` process, through which
+    object contents are read in bulk
+    """
+
+    def __init__(self, cwd: Optional[str] = None) -> None:
+        self.proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=cwd,
+        )
+        # Objects requested, but not yet read
+        self.unread = 0
+
+    def __enter__(self) -> "CatFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # With output left unread (e.g., the reader stopped early), git may be
+        # blocked writing it, and would never exit
+        if self.unread:
+            self.proc.terminate()
+
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                if stream:
+                    stream.close()
+            except OSError:
+                # Requests still buffered, when git has gone
+                pass
+        self.proc.wait()
+
+    def read_object(self) -> Optional[bytes]:
+        stdout: IO[bytes] = self.proc.stdout  # type: ignore
+        header = stdout.readline()
+        self.unread -= 1
+        if not header or header.endswith(b" missing\n"):
+            return None
+
+        size = int(header.split()[2])
+        contents = stdout.read(size)
+        stdout.read(1)  # Trailing newline
+
+        return contents
+
+    def get(self, obj: str) -> Optional[bytes]:
+        stdin: IO[bytes] = self.proc.stdin  # type: ignore
+        stdin.write(obj.encode() + b"\n")
+        stdin.flush()
+        self.unread += 1
+
+        return self.read_object()
+
+    def iter_objects(
+        self, objs: Iterable[str]
+    ) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        Yield (object name, contents) for each of `objs`, in order; requests
+        are written from a separate thread, so that git is never left waiting
+        """
+        objs = list(objs)
+        stdin: IO[bytes] = self.proc.stdin  # type: ignore
+        self.unread += len(objs)
+
+        def write_requests() -> None:
+            try:
+                for obj in objs:
+                    stdin.write(obj.encode() + b"\n")
+                stdin.flush()
+            except (BrokenPipeError, ValueError):
+                # The reader stopped early, and closed the process
+                pass
+
+        writer = threading.Thread(target=write_requests, daemon=True)
+        writer.start()
+
+        for obj in objs:
+            yield obj, self.read_object()
+
+        writer.join()
+
+
+def unquote_path(name: bytes) -> str:
+    """
+    A path as git writes it in a diff header: quoted, C-style, if it has
+    special characters (even with core.quotePath=false, e.g. for a tab)
+
+    >>> unquote_path(b'b/plain name.txt')
+    'b/plain name.txt'
+    >>> unquote_path(b'"b/tab\\\\there \\\\"q\\\\" \\\\303\\\\251.txt"')
+    'b/tab\\there "q" é.txt'
+    """
+    if not (name.startswith(b'"') and name.endswith(b'"')):
+        return name.decode("utf-8", "surrogateescape")
+
+    unquoted = bytearray()
+    i = 1
+    while i < len(name) - 1:
+        c = name[i : i + 1]
+        if c != b"\\":
+            unquoted += c
+            i += 1
+        elif name[i + 1 : i + 2].isdigit():
+            unquoted.append(int(name[i + 1 : i + 4], 8))
+            i += 4
+        else:
+            escaped = name[i + 1 : i + 2]
+            unquoted += C_ESCAPES.get(escaped, escaped)
+            i += 2
+
+    return bytes(unquoted).decode("utf-8", "surrogateescape")
+
+
+def parse_added_lines(diff: bytes) -> Dict[str, Set[int]]:
+    """
+    Line numbers (in the new version) added or modified, per file, from the
+    output of `git diff -U0`. The name of each file is only looked for in
+    its header (before its first hunk), as an added line may look like one.
+
+    >>> diff = (b'diff --git a/x.txt b/x.txt\\n--- a/x.txt\\n+++ b/x.txt\\n'
+    ...         b'@@ -1 +1,2 @@\\n-old\\n+new\\n+++ more\\n@@ -9,0 +11 @@\\n+end\\n'
+    ...         b'diff --git a/y z b/y z\\n--- a/y z\\t\\n+++ b/y z\\t\\n@@ -0,0 +1 @@\\n+y\\n')
+    >>> parse_added_lines(diff)
+    {'x.txt': {1, 2, 11}, 'y z': {1}}
+    """
+    added: Dict[str, Set[int]] = {}
+    lines: Set[int] = set()
+    in_header = False
+
+    for line in diff.split(b"\n"):
+        if line.startswith(b"diff --git "):
+            in_header = True
+            lines = set()
+            continue
+
+        if in_header:
+            if line.startswith(b"+++ "):
+                # A name with a space in it is followed by a tab
+                name = unquote_path(line[4:].rstrip(b"\t"))
+                if name.startswith("b/"):
+                    added[name[2:]] = lines
+                continue
+            elif not line.startswith(b"@@"):
+                continue
+            in_header = False
+
+        m = HUNK_HEADER_RE.match(line)
+        if m:
+            start = int(m.group(1))
+            cnt = 1 if m.group(2) is None else int(m.group(2))
+            lines.update(range(start, start + cnt))
+
+    return added
+
+
+def parse_raw_diff(raw: bytes) -> Dict[str, Optional[str]]:
+    """
+    The new blob of each added/modified file, from `git diff --raw -z`;
+    None if the new version is only in the working tree
+
+    >>> raw = b':100644 100644 ' + b'1' * 40 + b' ' + b'2' * 40 + b' M\\0a.txt\\0'
+    >>> parse_raw_diff(raw)['a.txt'] == '2' * 40
+    True
+    """
+    blobs: Dict[str, Optional[str]] = {}
+    fields = raw.split(b"\0")
+
+    for info, path in zip(fields[::2], fields[1::2]):
+        _, _, _, new_blob, status = info.decode().split()
+        if status.startswith("D"):
+            continue
+
+        blobs[path.decode("utf-8", "surrogateescape")] = (
+            None if new_blob == NULL_SHA else new_blob
+        )
+
+    return blobs
+
+
+def get_changed_files(
+    diff_args: List[str], cwd: Optional[str] = None
+) -> List[ChangedFile]:
+    """
+    Files, and the lines in them, added or modified by `git diff <diff_args>`
+    (e.g., ["--cached"] for staged changes, or ["main...HEAD"])
+    """
+    common = ["--no-color", "--no-ext-diff", "--no-renames"]
+    blobs = parse_raw_diff(
+        run_git(["diff", "--raw", "-z", "--abbrev=40"] + common + diff_args, cwd)
+    )
+    added = parse_added_lines(
+        run_git(
+            ["diff", "-U0", "--src-prefix=a/", "--dst-prefix=b/"] + common + diff_args,
+            cwd,
+        )
+    )
+
+    return [
+        ChangedFile(path, blob, added[path])
+        for path, blob in sorted(blobs.items())
+        if added.get(path)
+    ]
+
+
+def iter_changed_contents(
+    changed_files: List[ChangedFile], cwd: Optional[str] = None
+) -> Iterator[Tuple[ChangedFile, Optional[bytes]]]:
+    """
+    Yield each changed file with its new contents: blobs are read through a
+    single `git cat-file --batch`, working tree files from disk
+    """
+    with CatFile(cwd) as cat_file:
+        blobs = cat_file.iter_objects(
+            c.blob for c in changed_files if c.blob is not None
+        )
+
+        for changed in changed_files:
+            if changed.blob is not None:
+                _, contents = next(blobs)
+                yield changed, contents
+                continue
+
+            try:
+                with open(os.path.join(cwd or "", changed.path), "rb") as f:
+                    contents = f.read()
+            except OSError:
+                contents = None
+
+            yield changed, contents
+
+        for _ in blobs:
+            pass
+
+
+def iter_diff_typos(
+    diff_args: List[str], known_typos: Dict[str, str], cwd: Optional[str] = None
+) -> Iterator[Tuple[str, int, int, str]]:
+    """
+    Yield (path, line number, column, typo) for typos on the lines added or
+    modified by `git diff <diff_args>`; the rest of each file is not checked.
+    Paths are relative to the top of the working tree.
+    """
+    root = get_repo_root(cwd)
+    changed_files = get_changed_files(diff_args, root)
+
+    for changed, contents in iter_changed_contents(changed_files, root):
+        if contents is None or get_name_skip_reason(changed.path):
+            continue
+        if get_content_skip_reason(contents[:SNIFF_SIZE]):
+            continue
+
+        text, _ = decode_text(contents)
+        lines = text.split("\n")
+
+        for line_no in sorted(changed.added_lines):
+            if line_no > len(lines):
+                break
+
+            for m in WORD_RE.finditer(lines[line_no - 1]):
+                if m.group().lower() in known_typos:
+                    yield changed.path, line_no, m.start() + 1, m.group()
+
+
+def parse_index(ls_files: bytes) -> List[Tuple[str, str]]:
+    """
+    (path, blob) of each file staged in the index, from `git ls-files -s -z`;
+    files with unresolved conflicts, symlinks and submodules are left out
+
+    >>> entry = b'100644 ' + b'1' * 40 + b' 0\\tdir/a.txt\\0'
+    >>> parse_index(entry) == [('dir/a.txt', '1' * 40)]
+    True
+    """
+    staged = []
+
+    for entry in ls_files.split(b"\0"):
+        if not entry:
+            continue
+
+        info, path = entry.split(b"\t", 1)
+        mode, blob, stage = info.decode().split()
+        if stage != "0" or mode in NON_FILE_MODES:
+            continue
+
+        staged.append((path.decode("utf-8", "surrogateescape"), blob))
+
+    return staged
+
+
+def scan_blob(path: str, contents: bytes, known_typos: Dict[str, str]) -> FileScan:
+    """
+    Scan the contents of a blob, in memory (as scan_file does a file)
+
+    >>> scan_blob('a.txt', b'Teh tpyo, teh', {'teh': 'the', 'tpyo': 'typo'}).typos
+    ['Teh', 'teh', 'tpyo']
+    """
+    reason = get_content_skip_reason(contents[:SNIFF_SIZE])
+    if reason:
+        return FileScan(path, [], skipped=reason)
+
+    words = set(get_words_in_bytes(contents))
+    return FileScan(path, sorted(w for w in words if w.lower() in known_typos))
+
+
+def iter_index_typos(
+    known_typos: Dict[str, str],
+    cwd: Optional[str] = None,
+    cache: Optional["ScanCache"] = None,
+) -> Iterator[Tuple[str, int, int, str]]:
+    """
+    Yield (path, line number, column, typo) for typos anywhere in the staged
+    version of each file (i.e., what would be committed), with paths
+    relative to the top of the working tree. Blobs are read in bulk, through
+    a single `git cat-file --batch`, and each distinct blob only once; blobs
+    whose scans in `cache` found no typos are not read.
+    """
+    root = get_repo_root(cwd)
+
+    paths_by_blob: Dict[str, List[str]] = {}
+    for path, blob in parse_index(run_git(["ls-files", "-s", "-z"], root)):
+        if not get_name_skip_reason(path):
+            paths_by_blob.setdefault(blob, []).append(path)
+
+    # Blobs are keyed apart from files' digests (which hash contents alone)
+    scans: Dict[str, FileScan] = {}
+    if cache is not None:
+        for blob, paths in paths_by_blob.items():
+            scan = cache.get_result(paths[0], "blob:" + blob)
+            if scan is not None:
+                scans[blob] = scan
+
+    to_read = [b for b in paths_by_blob if b not in scans or scans[b].typos]
+
+    with CatFile(root) as cat_file:
+        for blob, contents in cat_file.iter_objects(to_read):
+            if contents is None:
+                continue
+
+            scan = scans.get(blob)
+            if scan is None:
+                scan = scan_blob(paths_by_blob[blob][0], contents, known_typos)
+                if cache is not None:
+                    cache.put_result("blob:" + blob, scan)
+            if not scan.typos:
+                continue
+
+            # Typos are only located (line by line) in blobs that have any
+            text, _ = decode_text(contents)
+            occurrences = list(iter_typo_occurrences(text.split("\n"), known_typos))
+
+            for path in paths_by_blob[blob]:
+                for occurrence in occurrences:
+                    yield (path,) + occurrence
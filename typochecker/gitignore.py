@@ -0,0 +1,250 @@
+import os
+import re
+import subprocess
+from typing import List, Optional, Pattern, Tuple
+
+# (pattern, is_negated, only_matches_directories)
+Rule = Tuple[Pattern, bool, bool]
+
+
+def translate_pattern(pattern: str) -> str:
+    """
+    Translate a .gitignore glob (already stripped of leading "/" and trailing
+    "/") into a regular expression matched against a relative path
+
+    >>> bool(re.fullmatch(translate_pattern('*.py[co]'), 'a.pyc'))
+    True
+    >>> bool(re.fullmatch(translate_pattern('docs/**/*.txt'), 'docs/x/y/z.txt'))
+    True
+    >>> bool(re.fullmatch(translate_pattern('docs/*.txt'), 'docs/x/z.txt'))
+    False
+    """
+    res = []
+    i, n = 0, len(pattern)
+
+    while i < n:
+        if pattern.startswith("**/", i):
+            res.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            res.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            res.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            res.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            j = pattern.find("]", i + 1)
+            if j == -1:
+                res.append(re.escape("["))
+                i += 1
+            else:
+                body = pattern[i + 1 : j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                res.append("[" + body.replace("\\", "\\\\") + "]")
+                i = j + 1
+        elif pattern[i] == "\\" and i + 1 < n:
+            res.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            res.append(re.escape(pattern[i]))
+            i += 1
+
+    return "".join(res)
+
+
+def parse_rule(line: str) -> Optional[Rule]:
+    line = line.rstrip("\n")
+    if not line.strip() or line.startswith("#"):
+        return None
+
+    # Trailing spaces are ignored, unless escaped
+    if not line.endswith("\\ "):
+        line = line.rstrip(" ")
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+
+    if not line:
+        return None
+
+    # Patterns without a slash match at any depth
+    if "/" not in line:
+        line = "**/" + line
+    line = line.lstrip("/")
+
+    return re.compile(translate_pattern(line)), negated, dir_only
+
+
+class GitIgnore(object):
+    """
+    Rules from a single .gitignore file, matched against paths relative to
+    the directory containing it
+
+    >>> g = GitIgnore(['*.log', '!keep.log', 'build/', '/top.txt'])
+    >>> g.match('a/b.log', False), g.match('keep.log', False)
+    (True, False)
+    >>> g.match('a/build', True), g.match('a/build', False)
+    (True, None)
+    >>> g.match('top.txt', False), g.match('a/top.txt', False)
+    (True, None)
+    """
+
+    def __init__(self, lines: List[str]) -> None:
+        self.rules = [r for r in (parse_rule(line) for line in lines) if r]
+        # Of the paths matched, relative to the directory containing the file
+        self.prefix = ""
+
+    def under(self, subdir: str) -> "GitIgnore":
+        """
+        These rules, for paths relative to `subdir` (relative to the
+        directory containing the file)
+
+        >>> GitIgnore(['/src/*.log']).under('src').match('a.log', False)
+        True
+        """
+        nested = GitIgnore([])
+        nested.rules = self.rules
+        nested.prefix = self.prefix + subdir.replace(os.sep, "/") + "/"
+        return nested
+
+    @classmethod
+    def from_file(cls, loc: str) -> Optional["GitIgnore"]:
+        try:
+            with open(loc, "r") as f:
+                gitignore = cls(f.readlines())
+        except (OSError, UnicodeDecodeError):
+            return None
+
+        return gitignore if gitignore.rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if explicitly not ignored, else None"""
+        rel_path = self.prefix + rel_path
+        res = None
+        for pattern, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if pattern.fullmatch(rel_path):
+                res = not negated
+
+        return res
+
+
+def is_ignored(
+    path: str, is_dir: bool, gitignores: List[Tuple[str, GitIgnore]]
+) -> bool:
+    """
+    Whether `path` is ignored by any of `gitignores`, given as
+    (directory, rules) from the outermost directory inwards; `path` must
+    be a path under each directory (e.g., built with os.path.join)
+
+    >>> gitignores = [('repo', GitIgnore(['*.log'])), ('repo/a', GitIgnore(['!x.log']))]
+    >>> is_ignored('repo/a/x.log', False, gitignores)
+    False
+    >>> is_ignored('repo/a/y.log', False, gitignores)
+    True
+    """
+    ignored = False
+    for base, gitignore in gitignores:
+        rel_path = path[len(os.path.join(base, "")) :]
+        res = gitignore.match(rel_path.replace(os.sep, "/"), is_dir)
+        if res is not None:
+            ignored = res
+
+    return ignored
+
+
+def find_git_dir(loc: str) -> Optional[Tuple[str, str]]:
+    """(work tree, git directory) of the repository `loc` is in, if any"""
+    work_tree = os.path.abspath(loc)
+
+    while True:
+        dot_git = os.path.join(work_tree, ".git")
+        if os.path.isdir(dot_git):
+            return work_tree, dot_git
+        elif os.path.isfile(dot_git):
+            # A linked work tree, or a submodule: "gitdir: <path>"
+            try:
+                with open(dot_git, "r") as f:
+                    git_dir = f.readline().strip()
+            except OSError:
+                return None
+            if git_dir.startswith("gitdir: "):
+                return work_tree, os.path.join(work_tree, git_dir[len("gitdir: ") :])
+            return None
+
+        parent = os.path.dirname(work_tree)
+        if parent == work_tree:
+            return None
+        work_tree = parent
+
+
+def get_excludes_file(work_tree: str) -> str:
+    """The user's excludes file (core.excludesFile, or git's default one)"""
+    try:
+        excludes_file = subprocess.run(
+            ["git", "config", "--path", "--get", "core.excludesFile"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=work_tree,
+        ).stdout.decode("utf-8", "surrogateescape")
+    except OSError:
+        # (e.g., git is not installed)
+        excludes_file = ""
+
+    if excludes_file.strip():
+        return os.path.join(work_tree, excludes_file.rstrip("\n"))
+
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.join(
+        os.path.expanduser("~"), ".config"
+    )
+    return os.path.join(config_home, "git", "ignore")
+
+
+def get_outer_gitignores(loc: str) -> List[Tuple[str, GitIgnore]]:
+    """
+    The rules that apply to paths under `loc` from outside it, as git
+    reads them (the user's excludes file, the repository's info/exclude,
+    and the .gitignore files from the top of the work tree down to the
+    parent of `loc`), as (`loc`, rules) from the lowest precedence up
+    """
+    found = find_git_dir(loc)
+    if found is None:
+        return []
+
+    work_tree, git_dir = found
+    loc_abs = os.path.abspath(loc)
+
+    outer: List[Tuple[str, str]] = [
+        (work_tree, get_excludes_file(work_tree)),
+        (work_tree, os.path.join(git_dir, "info", "exclude")),
+    ]
+    rel_loc = os.path.relpath(loc_abs, work_tree)
+    if rel_loc != os.curdir:
+        parts = rel_loc.split(os.sep)
+        for i in range(len(parts)):
+            base = os.path.join(work_tree, *parts[:i])
+            outer.append((base, os.path.join(base, ".gitignore")))
+
+    gitignores = []
+    for base, ignore_loc in outer:
+        gitignore = GitIgnore.from_file(ignore_loc)
+        if gitignore is None:
+            continue
+
+        subdir = os.path.relpath(loc_abs, base)
+        if subdir != os.curdir:
+            gitignore = gitignore.under(subdir)
+        gitignores.append((loc, gitignore))
+
+    return gitignores
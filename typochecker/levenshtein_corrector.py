@@ -3,19 +3,110 @@
 # https://github.com/norvig/pytudes/blob/master/py/spell.py
 
 import argparse
+import atexit
 import os
-from collections import Counter
+import re
+import sys
 
+from typochecker.corpus import count_corpus
+from typochecker.corpus_index import CorpusIndex, get_default_corpus_index_loc
+from typochecker.stats import Stats
 from typochecker.utils import (
     candidates,
     get_default_typos,
-    get_visible_subdirs,
-    get_words_in_file,
+    get_known_words,
+    iter_visible_files,
 )
 
 # Assumption: long lines (e.g., in JSON files) should be skipped
 MAX_LINE_LEN = 200
 
+# Longer words are not considered as typos
+MAX_TYPO_LEN = 20
+
+# Lowercase ASCII words (i.e., no digits or underscores) of a plausible length
+SUSPECTED_TYPO_RE = re.compile(r"[a-z]{{4,{}}}".format(MAX_TYPO_LEN))
+
+# Idea: commonly used words aren't typos
+MAX_TYPO_COUNT = 5
+
+
+def get_suspected_typos(word_counter, known_words, typos):
+    """
+    Rare, unknown words that may be typos, in sorted order. The filters run
+    in bulk (a single compiled-pattern pass, then set differences), rather
+    than as one Python-level pass per criterion.
+
+    >>> from collections import Counter
+    >>> word_counter = Counter(tpyo=1, typo=50, snake_case=1, abc=1, word2=1, xyzzy=9)
+    >>> get_suspected_typos(word_counter, {'typo'}, {})
+    ['tpyo']
+    >>> get_suspected_typos(word_counter, {'typo'}, {'tpyo': 'typo'})
+    []
+    """
+    suspects = {
+        w
+        for w in filter(SUSPECTED_TYPO_RE.fullmatch, word_counter)
+        if word_counter[w] <= MAX_TYPO_COUNT
+    }
+    suspects.difference_update(known_words, typos)
+
+    return sorted(suspects)
+
+
+def get_typo_candidates(
+    sorted_words,
+    word_counter,
+    max_distance=1,
+    ignore_prepends=False,
+    ignore_appends=False,
+):
+    """
+    Suspected typos with a (more common) correction in the corpus, as
+    [(typo, [(candidate, candidate_cnt, typo_cnt)], candidates)]
+    """
+    typo_candidates = []
+
+    for sorted_word in sorted_words:
+        cs = candidates(sorted_word, max_distance)
+
+        if ignore_prepends:
+            cs = [
+                c
+                for c in cs
+                if not c.endswith(sorted_word) and not sorted_word.startswith(c)
+            ]
+
+        if ignore_appends:
+            cs = [
+                c
+                for c in cs
+                if not c.startswith(sorted_word) and not sorted_word.endswith(c)
+            ]
+
+        if cs and len(cs) < 5 and sorted_word not in cs:
+            # Idea: the typo is made less frequently than the correct spelling
+            in_text = [
+                w
+                for w in cs
+                if w in word_counter
+                and word_counter[w] > word_counter[sorted_word]
+                and word_counter[w] > 10
+            ]
+
+            if not in_text:
+                continue
+
+            cnts = [(w, word_counter[w], word_counter[sorted_word]) for w in in_text]
+            print(
+                "typo candidate: {}->{}".format(
+                    sorted_word, ["{}".format(x) for x in cnts]
+                )
+            )
+            typo_candidates.append((sorted_word, cnts, ", ".join(in_text)))
+
+    return typo_candidates
+
 
 def order_typo_candidates(tcs):
     """
@@ -62,10 +153,6 @@ def is_new_typo(suspected_typo):
         return None
 
 
-def get_known_words(loc="/usr/share/dict/american-english"):
-    return set([w.lower() for w in get_words_in_file(loc)])
-
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -82,124 +169,109 @@ if __name__ == "__main__":
         help="If set, ignore suggestions where characters are only added to the end",
     )
 
-    args = parser.parse_args()
-
-    typos = get_default_typos()
+    parser.add_argument(
+        "--max-distance",
+        type=int,
+        choices=[1, 2],
+        default=1,
+        help="Consider corrections up to this many edits away from a suspected typo",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes to count words with (0 for one per core)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recount every file, rather than reusing counts for unchanged files",
+    )
 
-    all_files = get_visible_subdirs(args.dir)
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print where the time went (per phase) at exit",
+    )
+    parser.add_argument(
+        "--stats-json",
+        metavar="FILE",
+        help="Also write those statistics, as JSON, to FILE",
+    )
 
-    file_beginnings_to_ignore = ["LICENSE", "Makefile", "TypoMakefile"]
-    file_endings_to_ignore = ["~", ".exe", ".gz", ".jar", ".pdf", ".xml", ".zip"]
+    args = parser.parse_args()
 
-    word_counter = Counter()
+    # Only timed (and costs per file only measured) with --stats
+    stats = Stats(enabled=bool(args.stats or args.stats_json))
+    if stats.enabled:
+        atexit.register(stats.report, sys.stderr, args.stats_json)
 
-    print("Searching {} files".format(len(all_files)))
+    with stats.phase("load_typos"):
+        typos = get_default_typos()
 
-    file_words = []
+    all_files = stats.timed_iter("walk", iter_visible_files(args.dir))
 
-    known_words = get_known_words()
+    file_beginnings_to_ignore = ["Makefile", "TypoMakefile"]
 
-    searched_files = []
+    print("Searching files in {}".format(args.dir))
 
-    for search_file in all_files:
-        if any([search_file.endswith(e) for e in file_endings_to_ignore]):
-            continue
+    with stats.phase("load_dictionaries"):
+        known_words = get_known_words()
 
-        if any(
+    search_files = [
+        search_file
+        for search_file in all_files
+        if not any(
             [
                 search_file.split(os.sep)[-1].startswith(e)
                 for e in file_beginnings_to_ignore
             ]
-        ):
-            continue
-
-        searched_files.append(search_file)
-        try:
-            file_words_raw = get_words_in_file(search_file)
-            file_words = [w.lower() for w in file_words_raw]
-
-            word_counter.update(file_words)
-
-        except OSError:
-            pass
-        except UnicodeDecodeError:
-            pass
-
-    print("Done searching files")
-    sorted_words = list(word_counter.items())
-    sorted_words = [k for (k, _) in sorted_words]
-    sorted_words = [w for w in sorted_words if "_" not in w]
-    sorted_words = [w for w in sorted_words if len(w) > 3]
-    # sorted_words = [k for (k, v) in sorted(sorted_words, key=lambda x: x[-1])]
-    sorted_words = [w for w in sorted_words if w not in known_words]
-    sorted_words = [w for w in sorted_words if w not in typos]
-    sorted_words = [
-        w for w in sorted_words if not any([str(d) in w for d in range(10)])
+        )
     ]
-    sorted_words = sorted(list(set(sorted_words)))
 
-    print("Gathering candidates")
-
-    typo_candidates = []
+    # Longer words are neither suspected typos nor their candidates
+    max_word_len = MAX_TYPO_LEN + args.max_distance
 
-    ascii_letters = "abcdefghijklmnopqrstuvwxyz"
-    assert 26 == len(
-        ascii_letters
-    ), "Should have 26 letters in alphabet, not {}".format(len(ascii_letters))
-
-    for sorted_word in sorted_words:
-        if len(sorted_word) > 20:
-            continue
-
-        if any([c not in ascii_letters for c in sorted_word]):
-            continue
-
-        # Idea: commonly used words aren't typos
-        if word_counter[sorted_word] > 5:
-            continue
-
-        cs = candidates(sorted_word)
-
-        if args.ignore_prepends:
-            cs = [
-                c
-                for c in cs
-                if not c.endswith(sorted_word) and not sorted_word.startswith(c)
-            ]
+    with stats.phase("count"):
+        if args.no_cache:
+            num_searched, word_counter = count_corpus(
+                search_files, args.jobs, max_word_len=max_word_len
+            )
+        else:
+            with CorpusIndex(
+                get_default_corpus_index_loc(args.dir), max_word_len
+            ) as corpus_index:
+                num_searched, word_counter = corpus_index.update(
+                    search_files, args.jobs
+                )
 
-        if args.ignore_appends:
-            cs = [
-                c
-                for c in cs
-                if not c.startswith(sorted_word) and not sorted_word.endswith(c)
-            ]
+    print("Done searching {} files".format(num_searched))
+    stats.count("files_searched", num_searched)
+    stats.count("words_distinct", len(word_counter))
 
-        if cs and len(cs) < 5 and sorted_word not in cs:
-            # Idea: the typo is made less frequently than the correct spelling
-            in_text = [
-                w
-                for w in cs
-                if w in word_counter
-                and word_counter[w] > word_counter[sorted_word]
-                and word_counter[w] > 10
-            ]
+    with stats.phase("filter"):
+        sorted_words = get_suspected_typos(word_counter, known_words, typos)
+    stats.count("words_suspected", len(sorted_words))
 
-            if not in_text:
-                continue
+    print("Gathering candidates")
 
-            cnts = [(w, word_counter[w], word_counter[sorted_word]) for w in in_text]
-            print(
-                "typo candidate: {}->{}".format(
-                    sorted_word, ["{}".format(x) for x in cnts]
-                )
-            )
-            typo_candidates.append((sorted_word, cnts, ", ".join(in_text)))
+    with stats.phase("candidates"):
+        typo_candidates = get_typo_candidates(
+            sorted_words,
+            word_counter,
+            args.max_distance,
+            args.ignore_prepends,
+            args.ignore_appends,
+        )
+    stats.count("typo_candidates", len(typo_candidates))
 
     print("Found {} typo candidates".format(len(typo_candidates)))
 
     found_new_typos = []
-    for (typo, _, typo_candidates) in order_typo_candidates(typo_candidates):
-        res = is_new_typo((typo, typo_candidates))
+    for typo, _, typo_candidates in order_typo_candidates(typo_candidates):
+        with stats.phase("prompt"):
+            res = is_new_typo((typo, typo_candidates))
         if res == "!q":
             break
         if res is not None:
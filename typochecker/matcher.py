@@ -0,0 +1,45 @@
+import re
+from typing import Iterable, Iterator, Tuple
+
+# Same notion of a "word" as used when finding typos in a file
+WORD_RE = re.compile(r"[\w]+")
+
+
+class TypoMatcher(object):
+    """
+    Find every occurrence of a set of words in a line, in a single pass:
+    the line is split into words, and each word is looked up in a set.
+    Words are matched as whole words, including at the start/end of a line.
+
+    >>> m = TypoMatcher(['tpyo', 'Teh'])
+    >>> list(m.finditer('Teh tpyo, not tpyos: tpyo'))
+    [(0, 3, 'Teh'), (4, 8, 'tpyo'), (21, 25, 'tpyo')]
+
+    Ignoring a word takes effect immediately, even mid-line
+
+    >>> m.ignore('tpyo')
+    >>> list(m.finditer('Teh tpyo'))
+    [(0, 3, 'Teh')]
+    >>> bool(m), 'Teh' in m
+    (True, True)
+    """
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self.words = set(words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def __bool__(self) -> bool:
+        return bool(self.words)
+
+    def ignore(self, word: str) -> None:
+        self.words.discard(word)
+
+    def finditer(self, line: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield (start, end, word) for each occurrence, left to right"""
+        words = self.words
+        for m in WORD_RE.finditer(line):
+            word = m.group()
+            if word in words:
+                yield m.start(), m.end(), word
@@ -6,7 +6,12 @@ import argparse
 import os
 from collections import Counter
 
-from typochecker.utils import candidates, get_default_typos, get_words_in_file
+from typochecker.utils import (
+    candidates,
+    get_default_typos,
+    get_known_words,
+    get_words_in_file,
+)
 
 # Assumption: long lines (e.g., in JSON files) should be skipped
 MAX_LINE_LEN = 200
@@ -28,10 +33,6 @@ def is_new_typo(suspected_typo):
         return None
 
 
-def get_known_words(loc="/usr/share/dict/american-english"):
-    return set([w.lower() for w in get_words_in_file(loc)])
-
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -0,0 +1,76 @@
+import queue
+import threading
+from typing import Any, Iterable, Iterator, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# How often a blocked producer checks whether it should stop
+POLL_INTERVAL = 0.1
+
+
+def prefetch(items: Iterable[T], size: int) -> Iterator[T]:
+    """
+    Yield `items`, producing up to `size` of them ahead in a background
+    thread (e.g., scanning the next files while the user answers a prompt).
+    Exceptions are raised where the failing item would have been yielded.
+    A size of 0 (or less) produces items in the foreground, as they are needed.
+
+    >>> list(prefetch(range(5), 2))
+    [0, 1, 2, 3, 4]
+    >>> def failing():
+    ...     yield 1
+    ...     raise ValueError('unreadable')
+    >>> items = prefetch(failing(), 2)
+    >>> next(items)
+    1
+    >>> next(items)
+    Traceback (most recent call last):
+    ...
+    ValueError: unreadable
+    """
+    if size <= 0:
+        yield from items
+        return
+
+    entries: "queue.Queue[Tuple[bool, Any]]" = queue.Queue(maxsize=size)
+    stop = threading.Event()
+    it = iter(items)
+
+    def put(entry: Tuple[bool, Any]) -> bool:
+        while not stop.is_set():
+            try:
+                entries.put(entry, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in it:
+                if not put((True, item)):
+                    return
+        except BaseException as e:
+            put((False, e))
+        else:
+            put((False, None))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            ok, item = entries.get()
+            if not ok:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        # Let the producer finish its current item, so that the underlying
+        # iterator (e.g., with worker processes) can be closed from here
+        stop.set()
+        producer.join()
+        close = getattr(it, "close", None)
+        if close is not None:
+            close()
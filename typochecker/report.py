@@ -0,0 +1,77 @@
+import io
+import json
+from typing import Any, Dict, Iterable, TextIO, Tuple
+
+from typochecker.filetypes import read_text
+from typochecker.scanner import FileScan, iter_typo_occurrences
+from typochecker.typo_index import match_case
+
+
+def get_suggestions(typo: str, known_typos: Dict[str, str]) -> list:
+    """
+    >>> get_suggestions('Achive', {'achive': 'achieve, archive'})
+    ['Achieve', 'Archive']
+    """
+    suggestion = match_case(typo, known_typos[typo.lower()])
+    return [s.strip() for s in suggestion.split(",")]
+
+
+def get_record(
+    path: str, line_no: int, column: int, typo: str, known_typos: Dict[str, str]
+) -> Dict[str, Any]:
+    return {
+        "path": path,
+        "line": line_no,
+        "column": column,
+        "typo": typo,
+        "suggestions": get_suggestions(typo, known_typos),
+    }
+
+
+def write_occurrences(
+    occurrences: Iterable[Tuple[str, int, int, str]],
+    known_typos: Dict[str, str],
+    out: TextIO,
+) -> int:
+    """
+    Write (path, line number, column, typo) occurrences as JSON Lines,
+    returning the number written
+    """
+    cnt = 0
+    for path, line_no, column, typo in occurrences:
+        record = get_record(path, line_no, column, typo, known_typos)
+        out.write(json.dumps(record) + "\n")
+        cnt += 1
+
+    out.flush()
+
+    return cnt
+
+
+def write_report(
+    scans: Iterable[FileScan], known_typos: Dict[str, str], out: TextIO
+) -> int:
+    """
+    Write one JSON object per typo occurrence (JSON Lines), as files are
+    scanned; only files with typos are re-read, to locate the occurrences.
+    Returns the number of occurrences written.
+    """
+    cnt = 0
+
+    for scan in scans:
+        if not scan.typos:
+            continue
+
+        try:
+            text, _ = read_text(scan.path)
+        except OSError:
+            continue
+        occurrences = list(
+            iter_typo_occurrences(io.StringIO(text, newline=None), known_typos)
+        )
+
+        cnt += write_occurrences(
+            ((scan.path,) + o for o in occurrences), known_typos, out
+        )
+
+    return cnt
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from typochecker.scanner import FileScan
+from typochecker.utils import get_cache_dir
+
+# Bump whenever scanning (e.g., tokenizing or sniffing) changes,
+# so that results from older versions are not reused
+SCAN_CACHE_VERSION = 1
+
+# Files are hashed this many bytes at a time
+HASH_CHUNK_SIZE = 1 << 20
+
+# Results are committed after this many new scans
+COMMIT_EVERY = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    digest TEXT NOT NULL,
+    table_key TEXT NOT NULL,
+    typos TEXT NOT NULL,
+    skipped TEXT,
+    PRIMARY KEY (digest, table_key)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def get_default_scan_cache_loc() -> str:
+    return os.path.join(get_cache_dir(), "scans.sqlite3")
+
+
+def get_file_digest(f: str) -> str:
+    h = hashlib.sha1()
+    with open(f, "rb") as ff:
+        while True:
+            chunk = ff.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def get_file_digests(paths: List[str]) -> List[Optional[str]]:
+    """Hash files (e.g., in a worker process); None for those that cannot be read"""
+    digests: List[Optional[str]] = []
+    for f in paths:
+        try:
+            digests.append(get_file_digest(f))
+        except OSError:
+            digests.append(None)
+
+    return digests
+
+
+class ScanCache(object):
+    """
+    On-disk cache of scan results, keyed by file contents and typo table;
+    only results for the current table are kept.
+
+    A file (by absolute path) whose (mtime, size) is unchanged since it was
+    last seen is not
+    opened at all; otherwise it is hashed, so that identical contents
+    (e.g., vendored copies, or a file that was only touched) are not rescanned.
+    Lookups can be split in two (see get_unchanged), for files to be hashed
+    elsewhere (e.g., in worker processes).
+    """
+
+    def __init__(self, loc: str, table_key: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(loc)), exist_ok=True)
+
+        # May be used from a background thread (e.g., when prefetching),
+        # though never from two threads at once
+        self.conn = sqlite3.connect(loc, timeout=30, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.table_key = "{}:{}".format(SCAN_CACHE_VERSION, table_key)
+        self.prune()
+
+        # (mtime_ns, size) of files found changed, but not yet hashed
+        self.changed: Dict[str, Tuple[int, int]] = {}
+        # (mtime_ns, size, digest) of files looked up, but not yet scanned
+        self.unscanned: Dict[str, Tuple[int, int, str]] = {}
+        self.writes = 0
+        self.hits = 0
+
+    def __enter__(self) -> "ScanCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def prune(self) -> None:
+        """
+        Once the typo table changes, drop the results for earlier tables,
+        and the files seen (which have to be scanned again anyway)
+        """
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'table_key'"
+        ).fetchone()
+        if row is not None and row[0] == self.table_key:
+            return
+
+        self.conn.execute("DELETE FROM results WHERE table_key != ?", (self.table_key,))
+        self.conn.execute("DELETE FROM files")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('table_key', ?)", (self.table_key,)
+        )
+        self.conn.commit()
+
+    def get_result(self, f: str, digest: str) -> Optional[FileScan]:
+        row = self.conn.execute(
+            "SELECT typos, skipped FROM results WHERE digest = ? AND table_key = ?",
+            (digest, self.table_key),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return FileScan(f, json.loads(row[0]), skipped=row[1])
+
+    def get_unchanged(self, f: str) -> Optional[FileScan]:
+        """
+        The cached scan of `f`, if it has not changed (by mtime and size)
+        since it was last seen; it is only stat-ed. A changed file should
+        then be hashed, and looked up with get_identical.
+        """
+        try:
+            st = os.stat(f)
+        except OSError:
+            return None
+
+        row = self.conn.execute(
+            "SELECT mtime_ns, size, digest FROM files WHERE path = ?",
+            (os.path.abspath(f),),
+        ).fetchone()
+
+        if row is not None and row[:2] == (st.st_mtime_ns, st.st_size):
+            scan = self.get_result(f, row[2])
+            if scan is not None:
+                self.hits += 1
+                return scan
+
+        self.changed[f] = (st.st_mtime_ns, st.st_size)
+        return None
+
+    def get_identical(self, f: str, digest: Optional[str]) -> Optional[FileScan]:
+        """The cached scan of a changed file's contents, if they were scanned before"""
+        file_info = self.changed.pop(f, None)
+        if file_info is None or digest is None:
+            return None
+
+        scan = self.get_result(f, digest)
+        if scan is None:
+            self.unscanned[f] = file_info + (digest,)
+            return None
+
+        self.put_file(f, *file_info, digest)
+        self.hits += 1
+
+        return scan
+
+    def get(self, f: str) -> Optional[FileScan]:
+        """The cached scan of `f`, if its contents have been scanned before"""
+        scan = self.get_unchanged(f)
+        if scan is not None or f not in self.changed:
+            return scan
+
+        try:
+            digest: Optional[str] = get_file_digest(f)
+        except OSError:
+            digest = None
+
+        return self.get_identical(f, digest)
+
+    def put_file(self, f: str, mtime_ns: int, size: int, digest: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+            (os.path.abspath(f), mtime_ns, size, digest),
+        )
+
+    def put(self, scan: FileScan) -> None:
+        """Record the scan of a file previously looked up with `get`"""
+        file_info = self.unscanned.pop(scan.path, None)
+
+        # Failures to read a file are not cached
+        if file_info is None or scan.error:
+            return
+
+        self.put_file(scan.path, *file_info)
+        self.put_result(file_info[2], scan)
+
+    def put_result(self, digest: str, scan: FileScan) -> None:
+        """Record the scan of contents with this digest (e.g., a Git blob)"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+            (digest, self.table_key, json.dumps(scan.typos), scan.skipped),
+        )
+
+        self.writes += 1
+        if self.writes % COMMIT_EVERY == 0:
+            self.conn.commit()
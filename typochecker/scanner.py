@@ -0,0 +1,472 @@
+import os
+import pickle
+import re
+import string
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from typochecker.filetypes import (
+    ENCODING,
+    SNIFF_SIZE,
+    decode_text,
+    get_skip_reason,
+)
+
+if TYPE_CHECKING:
+    from typochecker.scan_cache import ScanCache
+    from typochecker.stats import Stats
+from typochecker.matcher import WORD_RE
+
+# Files are read (and tokenized) this many bytes at a time
+CHUNK_SIZE = 1 << 16
+
+# No typo is this long; longer words are dropped rather than buffered
+MAX_WORD_LEN = 256
+
+# Files are read as bytes, and only decoded in bulk (as UTF-8, where they
+# can be); a token is a run of ASCII word characters and non-ASCII bytes
+# (which may be letters, or part of a multi-byte character)
+TOKEN_BYTES = bytes(
+    sorted(
+        set(range(0x80, 0x100))
+        | {ord(c) for c in string.ascii_letters + string.digits + "_"}
+    )
+)
+TOKEN_RE = re.compile(rb"[\w\x80-\xff]+")
+
+
+class FileScan(NamedTuple):
+    path: str
+    typos: List[str]
+    error: Optional[str] = None
+    skipped: Optional[str] = None
+
+
+# A scan, with the seconds it took and the bytes read for it
+ScanWithCost = Tuple[FileScan, float, int]
+
+
+def get_typos_in_string(s: str, known_typos: Dict[str, str]) -> List:
+    """
+    >>> get_typos_in_string('foo buzz', {'foo': 'bar', 'bazz': 'buzz'})
+    ['foo']
+
+    >>> get_typos_in_string('foo bazz', {'foo': 'bar', 'bazz': 'buzz'})
+    ['bazz', 'foo']
+    """
+    words = re.findall(r"[\w]+", s)
+    uniq_words = set(words)
+
+    return sorted([w for w in uniq_words if w.lower() in known_typos])
+
+
+def get_words_in_bytes(data: bytes) -> List[str]:
+    """
+    The words in some bytes, decoded as UTF-8; if they are not valid UTF-8,
+    each token is decoded on its own instead (falling back to Latin-1)
+
+    >>> get_words_in_bytes('tpyo\u2014caf\xe9'.encode('utf-8'))
+    ['tpyo', 'café']
+    >>> get_words_in_bytes('tpyo caf\xe9'.encode('latin-1'))
+    ['tpyo', 'café']
+    """
+    text, encoding = decode_text(data)
+    if encoding == ENCODING:
+        return WORD_RE.findall(text)
+
+    return [
+        w
+        for token in TOKEN_RE.findall(data)
+        for w in WORD_RE.findall(decode_text(token)[0])
+    ]
+
+
+def iter_words_in_chunks(chunks: Iterable[bytes]) -> Iterator[Set[str]]:
+    """
+    Yield the distinct words in each chunk of bytes, where words (and
+    multi-byte characters) may be split across chunks; a partial word longer
+    than `MAX_WORD_LEN` is dropped rather than carried over, so only a
+    bounded amount of text is held at a time
+
+    >>> [sorted(ws) for ws in iter_words_in_chunks([b'foo ba', b'r b', b'az'])]
+    [['foo'], ['bar'], [], ['baz']]
+    """
+    tail = b""
+    skip_token = False
+
+    for chunk in chunks:
+        if skip_token:
+            # Drop the rest of an overly long token
+            rest = chunk.lstrip(TOKEN_BYTES)
+            skip_token = not rest
+            chunk = rest
+
+        data = tail + chunk
+
+        # Hold back a trailing token that may continue in the next chunk
+        cut = len(data.rstrip(TOKEN_BYTES))
+        tail = data[cut:]
+
+        if len(tail) > MAX_WORD_LEN:
+            tail = b""
+            skip_token = True
+
+        yield set(get_words_in_bytes(data[:cut]))
+
+    if tail:
+        yield set(get_words_in_bytes(tail))
+
+
+def iter_file_chunks(f: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    with open(f, "rb") as ff:
+        while True:
+            chunk = ff.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def get_typos_in_file(f: str, known_typos: Dict[str, str]) -> List:
+    """
+    Find typos while streaming the file, keeping only the distinct hits;
+    the file is read as bytes, and decoded a chunk at a time
+    """
+    hits = set()
+    for words in iter_words_in_chunks(iter_file_chunks(f)):
+        hits.update(w for w in words if w.lower() in known_typos)
+
+    return sorted(hits)
+
+
+def iter_typo_occurrences(
+    lines: Iterable[str], known_typos: Dict[str, str]
+) -> Iterator[Tuple[int, int, str]]:
+    """
+    Yield (line number, column, typo) for each occurrence, both 1-based
+
+    >>> list(iter_typo_occurrences(['foo bazz', 'Foo'], {'foo': 'bar'}))
+    [(1, 1, 'foo'), (2, 1, 'Foo')]
+    """
+    for line_no, line in enumerate(lines, 1):
+        for m in WORD_RE.finditer(line):
+            if m.group().lower() in known_typos:
+                yield line_no, m.start() + 1, m.group()
+
+
+def scan_file(f: str, known_typos: Dict[str, str]) -> FileScan:
+    """
+    Scan a file, reporting (rather than raising) problems reading it;
+    binary/generated files are skipped before any tokenizing is attempted
+    """
+    try:
+        reason = get_skip_reason(f)
+        if reason:
+            return FileScan(f, [], skipped=reason)
+
+        return FileScan(f, get_typos_in_file(f, known_typos))
+    except OSError:
+        return FileScan(f, [], "unreadable")
+
+
+def scan_file_with_cost(f: str, known_typos: Dict[str, str]) -> ScanWithCost:
+    """Scan a file, also measuring the time taken and (roughly) bytes read"""
+    start = time.perf_counter()
+    scan = scan_file(f, known_typos)
+    seconds = time.perf_counter() - start
+
+    try:
+        size = os.path.getsize(f)
+    except OSError:
+        size = 0
+
+    # Only the start of a skipped file is read
+    if scan.skipped or scan.error == "unreadable":
+        size = min(size, SNIFF_SIZE) if scan.skipped else 0
+
+    return scan, seconds, size
+
+
+# The typo table is sent with each chunk (pickled once, by the dispatching
+# process), as (bytes, table) of the last one a worker process unpickled, so
+# that it is only unpickled again when it changes
+_worker_table: Tuple[bytes, Dict[str, str]] = (b"", {})
+
+
+def get_worker_typos(table: bytes) -> Dict[str, str]:
+    global _worker_table
+    if _worker_table[0] != table:
+        _worker_table = (table, pickle.loads(table))
+    return _worker_table[1]
+
+
+def _scan_chunk(table: bytes, paths: List[str]) -> List[FileScan]:
+    known_typos = get_worker_typos(table)
+    return [scan_file(f, known_typos) for f in paths]
+
+
+def _scan_chunk_with_costs(table: bytes, paths: List[str]) -> List[ScanWithCost]:
+    known_typos = get_worker_typos(table)
+    return [scan_file_with_cost(f, known_typos) for f in paths]
+
+
+class Chunk(object):
+    """
+    Files sent to a worker to scan; the results are finished (e.g., cached)
+    once, when the first of them is needed
+    """
+
+    def __init__(self) -> None:
+        self.paths: List[str] = []
+        self.digests: List[Optional[str]] = []
+        self.future: Optional[Future] = None
+        self.scans: Optional[List[FileScan]] = None
+
+
+class Slot(NamedTuple):
+    """A file's place in line, waiting on a scan of it (or of identical contents)"""
+
+    path: str
+    digest: Optional[str]
+    chunk: Chunk
+    index: int
+
+
+class Hashing(NamedTuple):
+    """Files changed since they were cached, being hashed before they are scanned"""
+
+    paths: List[str]
+    future: Future
+
+
+QueueEntry = Union[Hashing, List[Union[FileScan, Slot]]]
+
+
+class ScanQueue(object):
+    """
+    Chunks of files in flight, across worker processes, in the order of the
+    files. With a cache, changed files are hashed by the workers too; those
+    whose contents were scanned before are not scanned again, and identical
+    files (e.g., vendored copies) are only scanned once between them.
+    """
+
+    def __init__(
+        self,
+        executor: ProcessPoolExecutor,
+        scan_chunk: Callable[[bytes, List[str]], List[Any]],
+        known_typos: Dict[str, str],
+        finish: Callable[[Any], FileScan],
+        cache: Optional["ScanCache"] = None,
+    ) -> None:
+        self.executor = executor
+        self.scan_chunk = scan_chunk
+        self.table = pickle.dumps(known_typos, pickle.HIGHEST_PROTOCOL)
+        self.finish = finish
+        self.cache = cache
+
+        self.pending: Deque[QueueEntry] = deque()
+        # The chunk, and place in it, of contents being scanned, by digest
+        self.scanning: Dict[str, Tuple[Chunk, int]] = {}
+
+    def submit(self, paths: List[str]) -> None:
+        if self.cache is None:
+            self.pending.append(self.dispatch(paths, [None] * len(paths)))
+            return
+
+        from typochecker.scan_cache import get_file_digests
+
+        self.pending.append(
+            Hashing(paths, self.executor.submit(get_file_digests, paths))
+        )
+
+    def dispatch(
+        self, paths: List[str], digests: List[Optional[str]]
+    ) -> List[Union[FileScan, Slot]]:
+        """Scan the files whose contents are neither cached, nor being scanned"""
+        chunk = Chunk()
+        entry: List[Union[FileScan, Slot]] = []
+
+        for f, digest in zip(paths, digests):
+            scan = None
+            if self.cache is not None:
+                scan = self.cache.get_identical(f, digest)
+
+            if scan is not None:
+                entry.append(scan)
+            elif digest is not None and digest in self.scanning:
+                entry.append(Slot(f, digest, *self.scanning[digest]))
+            else:
+                if digest is not None:
+                    self.scanning[digest] = (chunk, len(chunk.paths))
+                entry.append(Slot(f, digest, chunk, len(chunk.paths)))
+                chunk.paths.append(f)
+                chunk.digests.append(digest)
+
+        if chunk.paths:
+            chunk.future = self.executor.submit(
+                self.scan_chunk, self.table, chunk.paths
+            )
+
+        return entry
+
+    def advance(self) -> None:
+        """Scan the files in each chunk that has been hashed"""
+        for i in range(len(self.pending)):
+            entry = self.pending[i]
+            if isinstance(entry, Hashing) and entry.future.done():
+                self.pending[i] = self.dispatch(entry.paths, entry.future.result())
+
+    def is_ready(self) -> bool:
+        entry = self.pending[0]
+        if isinstance(entry, Hashing):
+            return False
+
+        return all(isinstance(s, FileScan) or s.chunk.future.done() for s in entry)
+
+    def get_scans(self, chunk: Chunk) -> List[FileScan]:
+        if chunk.scans is None:
+            chunk.scans = [self.finish(r) for r in chunk.future.result()]
+            for digest in chunk.digests:
+                if digest is not None:
+                    self.scanning.pop(digest, None)
+
+        return chunk.scans
+
+    def get_scan(self, slot: Slot) -> FileScan:
+        scan = self.get_scans(slot.chunk)[slot.index]
+        if scan.path == slot.path:
+            return scan
+
+        # Scanned once, for an identical file
+        scan = scan._replace(path=slot.path)
+        if self.cache is not None:
+            self.cache.put(scan)
+
+        return scan
+
+    def pop_ready(self) -> Iterator[FileScan]:
+        """The scans of the next entry in line, waiting for them if need be"""
+        entry = self.pending.popleft()
+        if isinstance(entry, Hashing):
+            entry = self.dispatch(entry.paths, entry.future.result())
+
+        for s in entry:
+            yield s if isinstance(s, FileScan) else self.get_scan(s)
+
+    def cancel(self) -> None:
+        for entry in self.pending:
+            if isinstance(entry, Hashing):
+                entry.future.cancel()
+                continue
+
+            for s in entry:
+                if isinstance(s, Slot) and s.chunk.future is not None:
+                    s.chunk.future.cancel()
+
+
+def record_scan(stats: "Stats", scan: FileScan, seconds: float, size: int) -> None:
+    stats.add_file(scan.path, seconds, size)
+    if scan.skipped:
+        stats.count("files_skipped.{}".format(scan.skipped))
+    elif scan.error:
+        stats.count("files_failed.{}".format(scan.error))
+    else:
+        stats.count("files_scanned")
+
+
+def get_jobs(jobs: int) -> int:
+    """A job count of 0 (or less) means one per core"""
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+
+def scan_files(
+    paths: Iterable[str],
+    known_typos: Dict[str, str],
+    jobs: int = 1,
+    chunksize: int = 32,
+    cache: Optional["ScanCache"] = None,
+    stats: Optional["Stats"] = None,
+) -> Iterator[FileScan]:
+    """
+    Scan files for typos, in parallel if `jobs` != 1; results are yielded
+    in the same order as `paths`, regardless of which worker finishes first.
+    Files found in `cache` are not scanned again. The cost of each scan
+    (measured where it runs, e.g., in a worker) is recorded in `stats`.
+
+    >>> [s.typos for s in scan_files([__file__], {'zzzz': 'z'})]
+    [['zzzz']]
+    """
+    jobs = get_jobs(jobs)
+
+    # Costs are only measured when they are recorded
+    if stats is None:
+        scan_one, scan_chunk = scan_file, _scan_chunk
+    else:
+        scan_one, scan_chunk = scan_file_with_cost, _scan_chunk_with_costs
+
+    def finish(result: Any) -> FileScan:
+        if stats is not None:
+            record_scan(stats, *result)
+            result = result[0]
+        if cache is not None:
+            cache.put(result)
+        return result
+
+    if jobs == 1:
+        for f in paths:
+            scan = cache.get(f) if cache is not None else None
+            if scan is None:
+                scan = finish(scan_one(f, known_typos))
+            yield scan
+        return
+
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    queue = ScanQueue(executor, scan_chunk, known_typos, finish, cache)
+
+    # Keep a bounded number of chunks in flight, so that results can be
+    # consumed (e.g., reviewed) while the rest of the files are scanned;
+    # cached results wait in line behind the files ahead of them. Only
+    # stat-ing a file (to find it unchanged) is left to this process.
+    chunk: List[str] = []
+
+    try:
+        for f in paths:
+            scan = cache.get_unchanged(f) if cache is not None else None
+
+            if scan is None:
+                chunk.append(f)
+            if chunk and (scan is not None or len(chunk) >= chunksize):
+                queue.submit(chunk)
+                chunk = []
+            if scan is not None:
+                queue.pending.append([scan])
+
+            queue.advance()
+            while queue.pending and (
+                len(queue.pending) >= 4 * jobs or queue.is_ready()
+            ):
+                yield from queue.pop_ready()
+
+        if chunk:
+            queue.submit(chunk)
+
+        while queue.pending:
+            yield from queue.pop_ready()
+    finally:
+        queue.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,149 @@
+# A resident checker, for editors and hooks that check often: the typo table
+# is loaded once, and checks are answered over a Unix domain socket, one JSON
+# object per line each way (see typochecker.client):
+#
+#   python -m typochecker.server &
+#   python -m typochecker.client path/to/file.py
+#
+# A request is {"path": "/abs/path"} or {"text": "...", "path": "label"},
+# with an optional "id" that is sent back. A response is {"typos": [...]}
+# (each typo as reported by `corrector --report`), {"skipped": "<reason>"}
+# (e.g., for a binary file), or {"error": "..."}.
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+from typing import Any, Dict
+
+from typochecker.checker import Checker
+from typochecker.client import get_default_socket_loc
+from typochecker.typo_table import get_whitelist_words
+
+
+def check_request(request: Any, checker: Checker) -> Dict[str, Any]:
+    """
+    >>> from typochecker.typo_index import TypoIndex
+    >>> checker = Checker(TypoIndex({'tpyo': 'typo'}))
+    >>> check_request({'text': 'a tpyo'}, checker)['typos'][0]['column']
+    3
+    >>> check_request({'path': '/no/such/file'}, checker)
+    {'error': 'unreadable'}
+    """
+    if not isinstance(request, dict):
+        return {"error": "Expected a JSON object"}
+
+    path = request.get("path")
+    text = request.get("text")
+
+    if text is not None:
+        if not isinstance(text, str):
+            return {"error": '"text" should be a string'}
+        occurrences = checker.check_text(text, path)
+    elif isinstance(path, str):
+        check = checker.check_file(path)
+        if check.error:
+            return {"error": check.error}
+        elif check.skipped:
+            return {"skipped": check.skipped}
+        occurrences = check.typos
+    else:
+        return {"error": 'Expected a "path" or "text"'}
+
+    return {"typos": [o._asdict() for o in occurrences]}
+
+
+class CheckHandler(socketserver.StreamRequestHandler):
+    """Answer each request on a connection, in turn"""
+
+    server: "CheckServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"error": "Expected a JSON object"}
+            else:
+                response = check_request(request, self.server.checker)
+                if isinstance(request, dict) and "id" in request:
+                    response["id"] = request["id"]
+
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class CheckServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Checks against a typo table held in memory; the table is only read, so
+    connections are served in parallel
+    """
+
+    daemon_threads = True
+
+    def __init__(self, loc: str, checker: Checker) -> None:
+        self.checker = checker
+
+        # Only this user may connect (the server reads files on their behalf)
+        umask = os.umask(0o177)
+        try:
+            super().__init__(loc, CheckHandler)
+        finally:
+            os.umask(umask)
+
+
+def is_listening(loc: str) -> bool:
+    """Whether a server is already listening at `loc` (not just a leftover file)"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(loc)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--socket",
+        help="Listen at this socket (default: {})".format(get_default_socket_loc()),
+    )
+    parser.add_argument(
+        "-w",
+        "--whitelist_word",
+        action="append",
+        help="Do not consider this word a typo. Argument can be repeated",
+    )
+    parser.add_argument(
+        "-W",
+        "--whitelist_file",
+        action="append",
+        help="A file containing words that should not be considered typos. Argument can be repeated",
+    )
+    args = parser.parse_args()
+
+    loc = args.socket or get_default_socket_loc()
+    if is_listening(loc):
+        sys.stderr.write("A server is already listening at {}\n".format(loc))
+        sys.exit(1)
+    elif os.path.exists(loc):
+        # Left behind by a server that did not shut down cleanly
+        os.unlink(loc)
+
+    whitelist = get_whitelist_words(args.whitelist_word, args.whitelist_file)
+    server = CheckServer(loc, Checker.load(whitelist))
+    sys.stderr.write("Listening at {}\n".format(loc))
+
+    # Clean up the socket when stopped (e.g., by a service manager), too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(loc)
@@ -0,0 +1,222 @@
+import heapq
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from typochecker.suggestion_response import SuggestionResponse
+
+try:
+    import resource
+except ImportError:
+    # (e.g., on Windows)
+    resource = None  # type: ignore
+
+T = TypeVar("T")
+
+SLOWEST_FILES = 10
+
+# Phases are charged the CPU time of the thread they run in where it can be
+# told apart (on Linux), as a background thread (e.g., prefetching) may be
+# busy meanwhile; elsewhere, that of the whole process. Worker processes'
+# CPU time is never included.
+PER_THREAD_CPU = resource is not None and hasattr(resource, "RUSAGE_THREAD")
+
+
+def get_cpu_time() -> float:
+    """CPU time (user and system) of this thread, where it can be told apart"""
+    if PER_THREAD_CPU:
+        usage = resource.getrusage(resource.RUSAGE_THREAD)
+        return usage.ru_utime + usage.ru_stime
+
+    return time.process_time()
+
+
+class Stats(object):
+    """
+    Opt-in instrumentation of a run: wall and CPU time per phase, counters
+    (e.g., bytes read, or files skipped by reason), and the slowest files.
+
+    Phases nest; time is charged to the innermost phase only, so that phase
+    times (within a thread) add up (e.g., walking the tree is not also
+    counted as scanning). Unless enabled, phases are not timed at all.
+
+    >>> stats = Stats()
+    >>> with stats.phase('outer'):
+    ...     with stats.phase('inner'):
+    ...         pass
+    >>> sorted(stats.phases)
+    ['inner', 'outer']
+    >>> stats.count('files_skipped.binary', 2)
+    >>> stats.add_file('a.txt', 0.5, 100)
+    >>> stats.counts['files_skipped.binary'], stats.counts['bytes_read']
+    (2, 100)
+    >>> with Stats(enabled=False).phase('outer'):
+    ...     pass
+    """
+
+    def __init__(
+        self, slowest_files: int = SLOWEST_FILES, enabled: bool = True
+    ) -> None:
+        self.enabled = enabled
+        # Phase name -> [wall time, CPU time], in seconds
+        self.phases: Dict[str, List[float]] = {}
+        self.counts: Counter = Counter()
+        self.slowest_files = slowest_files
+        self.slowest: List[Tuple[float, str]] = []  # A min-heap
+
+        self.started = (time.perf_counter(), time.process_time())
+
+        # Each thread has its own stack of phases (so a background thread's
+        # phases overlap those of the main thread)
+        self.local = threading.local()
+
+    def charge(self) -> List[str]:
+        """
+        Charge the time since the last phase change (in this thread) to the
+        current phase; returns the stack of phases
+        """
+        now = (time.perf_counter(), get_cpu_time())
+        local = self.local
+        if not hasattr(local, "stack"):
+            local.stack = []
+        elif local.stack:
+            totals = self.phases.setdefault(local.stack[-1], [0.0, 0.0])
+            totals[0] += now[0] - local.last[0]
+            totals[1] += now[1] - local.last[1]
+        local.last = now
+
+        return local.stack
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        self.charge().append(name)
+        try:
+            yield
+        finally:
+            self.charge().pop()
+
+    def timed_iter(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Charge the time spent producing each item to phase `name`"""
+        if not self.enabled:
+            return iter(items)
+
+        return self.iter_timed(name, items)
+
+    def iter_timed(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        it = iter(items)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] += n
+
+    def add_file(self, path: str, seconds: float, bytes_read: int) -> None:
+        self.counts["bytes_read"] += bytes_read
+
+        if len(self.slowest) < self.slowest_files:
+            heapq.heappush(self.slowest, (seconds, path))
+        else:
+            heapq.heappushpop(self.slowest, (seconds, path))
+
+    def to_dict(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.started[0]
+        cpu = time.process_time() - self.started[1]
+
+        return {
+            "wall": wall,
+            "cpu": cpu,
+            "phase_cpu": "thread" if PER_THREAD_CPU else "process",
+            "phases": {
+                name: {"wall": totals[0], "cpu": totals[1]}
+                for name, totals in self.phases.items()
+            },
+            "counts": dict(sorted(self.counts.items())),
+            "slowest_files": [
+                {"path": path, "seconds": seconds}
+                for seconds, path in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+    def write_summary(self, out: IO[str]) -> None:
+        stats = self.to_dict()
+
+        out.write(
+            "Total: {:.3f}s wall, {:.3f}s CPU (this process, not workers)\n".format(
+                stats["wall"], stats["cpu"]
+            )
+        )
+        out.write(
+            "Phases (CPU of the {} they ran in):\n".format(
+                "thread" if stats["phase_cpu"] == "thread" else "whole process"
+            )
+        )
+        for name, totals in sorted(
+            stats["phases"].items(), key=lambda x: x[1]["wall"], reverse=True
+        ):
+            out.write(
+                "  {:<24} {:>9.3f}s wall {:>9.3f}s CPU\n".format(
+                    name, totals["wall"], totals["cpu"]
+                )
+            )
+
+        for name, cnt in stats["counts"].items():
+            out.write("  {:<40} {:>12}\n".format(name, cnt))
+
+        if stats["slowest_files"]:
+            out.write("Slowest files:\n")
+            for f in stats["slowest_files"]:
+                out.write("  {:>9.3f}s {}\n".format(f["seconds"], f["path"]))
+
+    def write_json(self, loc: str) -> None:
+        with open(loc, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+    def report(self, out: IO[str], json_loc: Optional[str] = None) -> None:
+        self.write_summary(out)
+        if json_loc:
+            self.write_json(json_loc)
+
+
+class TimedResponse(SuggestionResponse):
+    """
+    Charge the time spent waiting on another responder (e.g., the user) to
+    the "prompt" phase, and count its responses by kind
+    """
+
+    def __init__(self, responder: SuggestionResponse, stats: Stats) -> None:
+        super().__init__()
+        self.responder = responder
+        self.stats = stats
+
+    def get_response(self, line, typo_span, suggestion, orig, prompt):
+        with self.stats.phase("prompt"):
+            response = self.responder.get_response(
+                line, typo_span, suggestion, orig, prompt
+            )
+
+        self.stats.count("responses.{}".format(type(response).__name__))
+
+        return response
@@ -1,3 +1,8 @@
+import json
+from collections import deque
+from typing import List, Optional
+
+
 class Response(object):
     def __init__(self) -> None:
         return
@@ -65,3 +70,90 @@ class AlwaysRespondIgnore(SuggestionResponse):
 
     def get_response(self, line, typo_span, suggestion, orig, prompt):
         return Ignore(orig)
+
+
+# Responses that can be recorded (Unknown only ever leads to a new prompt)
+RECORDABLE_RESPONSES = {cls.__name__: cls for cls in (Keep, Quit, Ignore, Literal)}
+
+
+def response_to_record(orig: str, response: Response) -> List[Optional[str]]:
+    """
+    >>> response_to_record('tpyo', Literal('typo'))
+    ['tpyo', 'Literal', 'typo']
+    >>> response_to_record('tpyo', Keep())
+    ['tpyo', 'Keep', None]
+    """
+    return [orig, type(response).__name__, getattr(response, "word", None)]
+
+
+def response_from_record(record: List[Optional[str]]) -> Response:
+    _, name, word = record
+    cls = RECORDABLE_RESPONSES[name]  # type: ignore
+
+    return cls(word) if cls in (Ignore, Literal) else cls()
+
+
+class RecordingResponse(SuggestionResponse):
+    """
+    Pass prompts on to another responder, recording its responses (e.g.,
+    to replay an interactive session later)
+    """
+
+    def __init__(self, responder: SuggestionResponse) -> None:
+        super().__init__()
+        self.responder = responder
+        self.records: List[List[Optional[str]]] = []
+
+    def get_response(self, line, typo_span, suggestion, orig, prompt):
+        response = self.responder.get_response(
+            line, typo_span, suggestion, orig, prompt
+        )
+        if type(response).__name__ in RECORDABLE_RESPONSES:
+            self.records.append(response_to_record(orig, response))
+
+        return response
+
+    def save(self, loc: str) -> None:
+        with open(loc, "w") as f:
+            json.dump(self.records, f)
+
+
+class ReplayResponse(SuggestionResponse):
+    """
+    Respond as recorded by a RecordingResponse; a prompt for a different
+    word than was recorded means the session has diverged from the recording
+
+    >>> recording = RecordingResponse(AlwaysRespondAccept())
+    >>> recording.get_response('a tpyo', (2, 6), 'typo', 'tpyo', '').word
+    'typo'
+    >>> replay = ReplayResponse(recording.records)
+    >>> replay.get_response('a tpyo', (2, 6), 'typo', 'tpyo', '').word
+    'typo'
+    >>> replay.get_response('a tpyo', (2, 6), 'typo', 'tpyo', '')
+    Traceback (most recent call last):
+    ...
+    ValueError: Recorded session ended before prompt for tpyo
+    """
+
+    def __init__(self, records: List[List[Optional[str]]]) -> None:
+        super().__init__()
+        self.records = deque(records)
+
+    @classmethod
+    def from_file(cls, loc: str) -> "ReplayResponse":
+        with open(loc, "r") as f:
+            return cls(json.load(f))
+
+    def get_response(self, line, typo_span, suggestion, orig, prompt):
+        if not self.records:
+            raise ValueError("Recorded session ended before prompt for {}".format(orig))
+
+        record = self.records.popleft()
+        if record[0] != orig:
+            raise ValueError(
+                "Recorded session expected a prompt for {}, not {}".format(
+                    record[0], orig
+                )
+            )
+
+        return response_from_record(record)
@@ -0,0 +1,267 @@
+# Symmetric-delete spelling correction, after Wolf Garbe's SymSpell,
+# https://github.com/wolfgarbe/SymSpell
+#
+# Rather than generating every edit of a word (as Norvig's edits1/edits2 do)
+# and looking each one up, the deletes of every dictionary word are indexed
+# ahead of time; a query then only needs to generate its own deletes.
+
+import marshal
+import os
+import tempfile
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+# Bump whenever the layout of the persisted index changes
+SYMSPELL_VERSION = 1
+
+MAX_DISTANCE = 2
+
+# Only the deletes of the first few characters of each word are indexed
+# (candidates are always verified against the whole word)
+PREFIX_LENGTH = 7
+
+
+def get_deletes(word: str, max_distance: int) -> Set[str]:
+    """
+    All strings obtained by deleting up to `max_distance` characters
+
+    >>> sorted(get_deletes('abc', 1))
+    ['ab', 'abc', 'ac', 'bc']
+    """
+    deletes = {word}
+    frontier = {word}
+
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1 :] for w in frontier for i in range(len(w))}
+        deletes.update(frontier)
+
+    return deletes
+
+
+def get_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Edit distance, counting deletes, inserts, replaces and adjacent
+    transposes (i.e., the edits of Norvig's edits1); returns
+    `max_distance` + 1 as soon as the distance is known to exceed it
+
+    >>> get_distance('tpyo', 'typo', 2), get_distance('speling', 'spelling', 2)
+    (1, 1)
+    >>> get_distance('abc', 'xyz', 2)
+    3
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    prev_prev: List[int] = []
+    prev = list(range(len(b) + 1))
+
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (
+                i > 1
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+                and prev_prev[j - 2] + 1 < cur[j]
+            ):
+                cur[j] = prev_prev[j - 2] + 1
+
+        if min(cur) > max_distance:
+            return max_distance + 1
+
+        prev_prev, prev = prev, cur
+
+    return min(prev[len(b)], max_distance + 1)
+
+
+def hash_delete(delete: str) -> int:
+    return zlib.crc32(delete.encode("utf-8", "surrogatepass"))
+
+
+class SymSpellIndex(object):
+    """
+    Dictionary words, indexed by the (hashes of the) deletes of their prefixes.
+
+    Each entry of `entries` is (hash << 32 | word id), sorted, so that the
+    words sharing a delete are found by binary search. Hash collisions only
+    cost an extra distance check.
+
+    >>> index = SymSpellIndex.build(['spelling', 'spewing', 'typo', 'type'])
+    >>> sorted(index.lookup('speling', 1))
+    ['spelling', 'spewing']
+    >>> sorted(index.lookup('tpyo', 2))
+    ['type', 'typo']
+    >>> sorted(index.candidates('tpyo', 2))
+    ['typo']
+    """
+
+    def __init__(
+        self,
+        words: List[str],
+        entries: array,
+        max_distance: int = MAX_DISTANCE,
+        prefix_length: int = PREFIX_LENGTH,
+    ) -> None:
+        self.words = words
+        self.entries = entries
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.word_set = set(words)
+
+    @classmethod
+    def build(
+        cls,
+        words: Iterable[str],
+        max_distance: int = MAX_DISTANCE,
+        prefix_length: int = PREFIX_LENGTH,
+    ) -> "SymSpellIndex":
+        word_list = sorted(set(words))
+
+        # Sort bucket by bucket (on the top bits of the hash), to avoid
+        # materializing every entry as a Python int at once
+        buckets: Dict[int, array] = {}
+        for word_id, word in enumerate(word_list):
+            for delete in get_deletes(word[:prefix_length], max_distance):
+                h = hash_delete(delete)
+                bucket = buckets.get(h >> 20)
+                if bucket is None:
+                    bucket = buckets[h >> 20] = array("Q")
+                bucket.append(h << 32 | word_id)
+
+        entries = array("Q")
+        for key in sorted(buckets):
+            entries.extend(sorted(buckets.pop(key)))
+
+        return cls(word_list, entries, max_distance, prefix_length)
+
+    def lookup(self, word: str, max_distance: int = 1) -> Set[str]:
+        """Dictionary words within `max_distance` edits of `word`"""
+        if max_distance > self.max_distance:
+            raise ValueError(
+                "Index supports distances of up to {}".format(self.max_distance)
+            )
+
+        entries = self.entries
+        n = len(entries)
+        found = set()
+        checked = set()
+
+        for delete in get_deletes(word[: self.prefix_length], max_distance):
+            h = hash_delete(delete)
+            i = bisect_left(entries, h << 32)
+            while i < n and entries[i] >> 32 == h:
+                word_id = entries[i] & 0xFFFFFFFF
+                i += 1
+
+                if word_id in checked:
+                    continue
+                checked.add(word_id)
+
+                candidate = self.words[word_id]
+                if abs(len(candidate) - len(word)) > max_distance:
+                    continue
+                if get_distance(word, candidate, max_distance) <= max_distance:
+                    found.add(candidate)
+
+        return found
+
+    def candidates(self, word: str, max_distance: int = 1) -> Set[str]:
+        """
+        Like Norvig's candidates: the word itself if known, else the known
+        words at the smallest distance (up to `max_distance`) from it
+        """
+        if word in self.word_set:
+            return {word}
+
+        found = self.lookup(word, max_distance)
+        if not found:
+            return set()
+
+        distances = {w: get_distance(word, w, max_distance) for w in found}
+        closest = min(distances.values())
+
+        return {w for w, d in distances.items() if d == closest}
+
+    def save(self, loc: str) -> None:
+        """Write atomically, so that concurrent runs never see a partial index"""
+        os.makedirs(os.path.dirname(os.path.abspath(loc)), exist_ok=True)
+
+        data = marshal.dumps(
+            (
+                SYMSPELL_VERSION,
+                self.max_distance,
+                self.prefix_length,
+                "\n".join(self.words),
+                self.entries.tobytes(),
+            )
+        )
+
+        fd, tmp_loc = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(loc)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_loc, loc)
+        except OSError:
+            os.unlink(tmp_loc)
+            raise
+
+    @classmethod
+    def load(cls, loc: str) -> Optional["SymSpellIndex"]:
+        try:
+            with open(loc, "rb") as f:
+                version, max_distance, prefix_length, words, entries = marshal.loads(
+                    f.read()
+                )
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+        if version != SYMSPELL_VERSION:
+            return None
+
+        entry_array = array("Q")
+        entry_array.frombytes(entries)
+
+        return cls(
+            words.split("\n") if words else [], entry_array, max_distance, prefix_length
+        )
+
+
+def get_index_key(locs: Sequence[str]) -> str:
+    """Identifies the dictionary files (by name, size and mtime) and settings"""
+    parts = [str(SYMSPELL_VERSION), str(MAX_DISTANCE), str(PREFIX_LENGTH)]
+    for loc in locs:
+        try:
+            st = os.stat(loc)
+            parts.append("{}:{}:{}".format(loc, st.st_size, st.st_mtime_ns))
+        except OSError:
+            parts.append("{}:missing".format(loc))
+
+    return "{:08x}".format(zlib.crc32("|".join(parts).encode()))
+
+
+def load_index(
+    locs: Sequence[str], get_words: Callable[[], Iterable[str]], cache_dir: str
+) -> SymSpellIndex:
+    """
+    Load the persisted index for the dictionaries at `locs`, building
+    (and persisting) it from `get_words` if they have changed
+    """
+    loc = os.path.join(cache_dir, "symspell-{}.bin".format(get_index_key(locs)))
+
+    index = SymSpellIndex.load(loc)
+    if index is not None:
+        return index
+
+    index = SymSpellIndex.build(get_words())
+
+    try:
+        index.save(loc)
+    except OSError:
+        print("Could not write spelling index to {}".format(loc))
+
+    return index
@@ -0,0 +1,101 @@
+import os
+import random
+from typing import Dict, List, Sequence, Tuple
+
+# (target line length, weight): mostly code-like lines, with a few long ones
+LINE_LENGTHS: Sequence[Tuple[int, float]] = ((40, 0.3), (80, 0.6), (400, 0.1))
+
+# What goes between two words, and how often
+SEPARATORS = (" ", " ", " ", ", ", "_", ".", "(", ") ", " = ", ": ")
+
+FILE_EXTENSIONS = (".py", ".md", ".txt", ".js", ".c")
+
+
+def get_vocabulary(typos: Dict[str, str]) -> List[str]:
+    """
+    Correctly spelled words to build text from: the suggested corrections
+
+    >>> get_vocabulary({'tpyo': 'typo', 'teh': 'the, ten'})
+    ['ten', 'the', 'typo']
+    """
+    return sorted(
+        {w.strip() for suggestion in typos.values() for w in suggestion.split(",")}
+        - {""}
+    )
+
+
+def generate_line(
+    rng: random.Random,
+    vocabulary: Sequence[str],
+    typos: Sequence[str],
+    typo_density: float,
+    length: int,
+) -> str:
+    """
+    A line of about `length` characters, where each word is one of `typos`
+    with probability `typo_density`
+
+    >>> rng = random.Random(0)
+    >>> generate_line(rng, ['ok'], ['tpyo'], 0.0, 10)
+    'ok(ok) ok = ok'
+    >>> generate_line(rng, ['ok'], ['tpyo'], 1.0, 10)
+    'tpyo = tpyo'
+    """
+    parts = []
+    size = 0
+
+    while size < length:
+        if typos and rng.random() < typo_density:
+            word = rng.choice(typos)
+        else:
+            word = rng.choice(vocabulary)
+
+        if parts:
+            sep = rng.choice(SEPARATORS)
+            parts.append(sep)
+            size += len(sep)
+
+        parts.append(word)
+        size += len(word)
+
+    return "".join(parts)
+
+
+def generate_corpus(
+    dest: str,
+    typos: Dict[str, str],
+    num_files: int = 100,
+    lines_per_file: int = 200,
+    typo_density: float = 0.001,
+    line_lengths: Sequence[Tuple[int, float]] = LINE_LENGTHS,
+    seed: int = 0,
+) -> List[str]:
+    """
+    Write a repo-like tree of text files under `dest`, the same for the same
+    arguments (and seed); returns the paths written, in order
+    """
+    rng = random.Random(seed)
+    vocabulary = get_vocabulary(typos)
+    typo_words = sorted(typos)
+    lengths = [length for length, _ in line_lengths]
+    weights = [weight for _, weight in line_lengths]
+
+    paths = []
+    for i in range(num_files):
+        # A few levels of nesting, a handful of files per directory
+        subdir = os.path.join(*["d{}".format(d) for d in divmod(i // 8, 4)])
+        os.makedirs(os.path.join(dest, subdir), exist_ok=True)
+
+        path = os.path.join(
+            dest, subdir, "f{}{}".format(i, FILE_EXTENSIONS[i % len(FILE_EXTENSIONS)])
+        )
+        with open(path, "w") as f:
+            for length in rng.choices(lengths, weights, k=lines_per_file):
+                f.write(
+                    generate_line(rng, vocabulary, typo_words, typo_density, length)
+                )
+                f.write("\n")
+
+        paths.append(path)
+
+    return paths
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from typochecker.benchmark import ScriptedResponse
+from typochecker.corrector import review_scans
+from typochecker.scanner import scan_files
+from typochecker.suggestion_response import RecordingResponse, ReplayResponse
+from typochecker.synthetic import generate_corpus
+from typochecker.typo_index import TypoIndex
+
+TYPOS = {"tpyo": "typo", "teh": "the", "wich": "which, witch"}
+
+
+def read_all(paths):
+    contents = []
+    for path in paths:
+        with open(path, "r") as f:
+            contents.append(f.read())
+    return contents
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+    def test_seeded(self):
+        with tempfile.TemporaryDirectory() as d:
+            kwargs = dict(num_files=10, lines_per_file=20, typo_density=0.1)
+            first = generate_corpus(os.path.join(d, "a"), TYPOS, seed=1, **kwargs)
+            second = generate_corpus(os.path.join(d, "b"), TYPOS, seed=1, **kwargs)
+            third = generate_corpus(os.path.join(d, "c"), TYPOS, seed=2, **kwargs)
+
+            self.assertEqual(read_all(first), read_all(second))
+            self.assertNotEqual(read_all(first), read_all(third))
+
+
+class TestReplaySession(unittest.TestCase):
+    def test_replay_matches_recording(self):
+        with tempfile.TemporaryDirectory() as d:
+            kwargs = dict(num_files=10, lines_per_file=20, typo_density=0.1)
+            recorded = generate_corpus(os.path.join(d, "a"), TYPOS, **kwargs)
+            replayed = generate_corpus(os.path.join(d, "b"), TYPOS, **kwargs)
+
+            recording = RecordingResponse(ScriptedResponse())
+            review_scans(scan_files(recorded, TYPOS), TypoIndex(TYPOS), recording)
+            self.assertTrue(recording.records)
+
+            replay = ReplayResponse(recording.records)
+            review_scans(scan_files(replayed, TYPOS), TypoIndex(TYPOS), replay)
+
+            self.assertFalse(replay.records)
+            self.assertEqual(read_all(recorded), read_all(replayed))
+
+
+if __name__ == "__main__":
+    unittest.main()
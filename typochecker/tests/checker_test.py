@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from typochecker.checker import Checker, FileCheck, Occurrence
+from typochecker.typo_index import TypoIndex
+
+
+class TestChecker(unittest.TestCase):
+    def test_check_many_matches_check_file(self):
+        checker = Checker(TypoIndex({"tpyo": "typo", "teh": "the"}))
+
+        with tempfile.TemporaryDirectory() as d:
+            paths = []
+            for i in range(20):
+                path = os.path.join(d, "f{}.txt".format(i))
+                with open(path, "w") as f:
+                    f.write("ok\nTeh tpyo\n" if i % 3 else "nothing here\n")
+                paths.append(path)
+
+            binary = os.path.join(d, "f.bin")
+            with open(binary, "wb") as f:
+                f.write(b"tpyo\0")
+            missing = os.path.join(d, "missing.txt")
+            paths += [binary, missing]
+
+            serial = list(checker.check_many(paths))
+            with checker:
+                parallel = list(checker.check_many(paths, jobs=2, chunksize=4))
+
+                # The same worker processes serve later calls
+                executor = checker.executor
+                self.assertEqual(list(checker.check_many(paths, jobs=2)), parallel)
+                self.assertIs(checker.executor, executor)
+            self.assertIsNone(checker.executor)
+
+            self.assertEqual(serial, [checker.check_file(p) for p in paths])
+
+        self.assertEqual(serial, parallel)
+        self.assertEqual(
+            serial[1],
+            FileCheck(
+                paths[1],
+                [
+                    Occurrence(paths[1], 2, 1, "Teh", ["The"]),
+                    Occurrence(paths[1], 2, 5, "tpyo", ["typo"]),
+                ],
+            ),
+        )
+        self.assertEqual(serial[-2].skipped, "binary")
+        self.assertEqual(serial[-1].error, "unreadable")
+
+
+if __name__ == "__main__":
+    unittest.main()
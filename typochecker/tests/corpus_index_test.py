@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import typochecker.corpus as c
+from typochecker.corpus_index import CorpusIndex
+
+
+class TestCorpusIndex(unittest.TestCase):
+    def test_only_changed_files_are_recounted(self):
+        with tempfile.TemporaryDirectory() as d:
+            paths = [os.path.join(d, name) for name in ["a.txt", "b.txt", "c.txt"]]
+            for path, text in zip(paths, ["spelling speling\n", "spelling\n", "x\n"]):
+                with open(path, "w") as f:
+                    f.write(text)
+
+            index_loc = os.path.join(d, "cache", "corpus.sqlite3")
+            expected = c.count_corpus(paths, max_word_len=22)
+
+            with mock.patch.object(
+                c, "count_words_in_file", wraps=c.count_words_in_file
+            ) as count_words_in_file:
+                with CorpusIndex(index_loc, 22) as index:
+                    self.assertEqual(index.update(paths), expected)
+                self.assertEqual(count_words_in_file.call_count, 3)
+
+                # Modify one file, and remove another
+                with open(paths[0], "a") as f:
+                    f.write("more words\n")
+                os.remove(paths[2])
+                paths = paths[:2]
+
+                with CorpusIndex(index_loc, 22) as index:
+                    updated = index.update(paths)
+                self.assertEqual(count_words_in_file.call_count, 4)
+
+                # Nothing changed: counts come from the stored aggregate
+                with CorpusIndex(index_loc, 22) as index:
+                    self.assertEqual(index.update(paths), updated)
+                self.assertEqual(count_words_in_file.call_count, 4)
+
+            self.assertEqual(updated, c.count_corpus(paths, max_word_len=22))
+            self.assertNotIn("x", updated[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
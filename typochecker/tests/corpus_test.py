@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+
+from typochecker.corpus import count_corpus
+
+
+class TestParallelCount(unittest.TestCase):
+    def test_matches_serial(self):
+        with tempfile.TemporaryDirectory() as d:
+            paths = []
+            for i in range(50):
+                path = os.path.join(d, "f{}.txt".format(i))
+                with open(path, "w") as f:
+                    f.write("Spelling spelling speling word{}\n".format(i % 7))
+                    f.write("a_very_long_identifier_indeed\n")
+                paths.append(path)
+            paths.append(os.path.join(d, "missing.txt"))
+
+            serial = count_corpus(paths, max_word_len=22)
+            parallel = count_corpus(paths, jobs=3, chunksize=4, max_word_len=22)
+
+        self.assertEqual(serial, parallel)
+        self.assertEqual(parallel[0], 50)
+        self.assertEqual(parallel[1]["spelling"], 100)
+        self.assertEqual(parallel[1]["word0"], 8)
+        self.assertNotIn("a_very_long_identifier_indeed", parallel[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,22 @@
+import json
+import os
+import stat
+import subprocess
+import sys
+import tempfile
 import unittest
 
 import typochecker.corrector as c
+from typochecker.prefetch import prefetch
 from typochecker.suggestion_response import (
     AlwaysRespondAccept,
     AlwaysRespondIgnore,
     AlwaysRespondKeep,
+    Literal,
+    Quit,
+    SuggestionResponse,
 )
+from typochecker.typo_index import TypoIndex
 
 
 class TestTrivialLine(unittest.TestCase):
@@ -76,5 +87,208 @@ class TestMultipleVersionsInLine(unittest.TestCase):
                 c.iterate_over_lines([line], typos, [file_typo], responder)
 
 
+class TestCaseFolding(unittest.TestCase):
+    def test_1(self):
+        typos = TypoIndex({"tpyo": "typo"})
+        line = "Tpyo, TPYO and tpyo"
+        file_typos = c.get_typos_in_string(line, typos)
+
+        all_lines, has_rewrites = c.iterate_over_lines(
+            [line], typos, file_typos, AlwaysRespondAccept()
+        )
+        self.assertTrue(has_rewrites)
+        self.assertEqual(all_lines, ["Typo, TYPO and typo"])
+
+        # Ignoring one casing ignores all of them
+        c.iterate_over_lines([line], typos, file_typos, AlwaysRespondIgnore())
+        self.assertEqual(c.get_typos_in_string(line, typos), [])
+
+
+class RecordLines(SuggestionResponse):
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    def get_response(self, line, typo_span, suggestion, orig, prompt):
+        self.prompts.append((line, typo_span))
+        return Literal(suggestion)
+
+
+class TestLongLine(unittest.TestCase):
+    def test_1(self):
+        typos = {"tpyo": "typo"}
+        line = " ".join(["word"] * 500 + ["tpyo"] + ["word"] * 500) + "\n"
+
+        responder = RecordLines()
+        fixed, has_rewrites = c.iterate_over_lines([line], typos, ["tpyo"], responder)
+        self.assertTrue(has_rewrites)
+        self.assertEqual(fixed, [line.replace("tpyo", "typo")])
+
+        # Only a window around the typo is shown
+        ((shown, (start, end)),) = responder.prompts
+        self.assertLessEqual(len(shown), c.DISPLAY_WIDTH + 2 * len(c.ELLIPSIS))
+        self.assertEqual(shown[start:end], "tpyo")
+
+
+class RespondQuit(SuggestionResponse):
+    def get_response(self, line, typo_span, suggestion, orig, prompt):
+        return Quit()
+
+
+class TestRewriteFile(unittest.TestCase):
+    def test_1(self):
+        typos = TypoIndex({"tpyo": "typo", "teh": "the"})
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "script.sh")
+            with open(path, "w", newline="") as f:
+                f.write("tpyo at the start\r\nand at teh end: Tpyo\r\n")
+            os.chmod(path, 0o750)
+            file_typos = c.get_typos_in_file(path, typos)
+
+            # Quitting leaves the file untouched
+            res = c.iterate_over_file(path, typos, file_typos, RespondQuit())
+            self.assertIsInstance(res, Quit)
+            with open(path, "rb") as f:
+                self.assertEqual(
+                    f.read(), b"tpyo at the start\r\nand at teh end: Tpyo\r\n"
+                )
+
+            c.iterate_over_file(path, typos, file_typos, AlwaysRespondAccept())
+            with open(path, "rb") as f:
+                self.assertEqual(
+                    f.read(), b"typo at the start\r\nand at the end: Typo\r\n"
+                )
+
+            # Only the file itself is left in the directory, with its mode
+            self.assertEqual(os.listdir(d), ["script.sh"])
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o750)
+
+
+class TestLatin1File(unittest.TestCase):
+    def test_1(self):
+        typos = TypoIndex({"tpyo": "typo"})
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "legacy.txt")
+            with open(path, "wb") as f:
+                f.write("Caf\u00e9 \u00ab tpyo \u00bb\n".encode("latin-1"))
+            file_typos = c.get_typos_in_file(path, typos)
+            self.assertEqual(file_typos, ["tpyo"])
+
+            c.iterate_over_file(path, typos, file_typos, AlwaysRespondAccept())
+            with open(path, "rb") as f:
+                self.assertEqual(
+                    f.read(), "Caf\u00e9 \u00ab typo \u00bb\n".encode("latin-1")
+                )
+
+
+class TestReadAhead(unittest.TestCase):
+    def test_1(self):
+        typos = TypoIndex({"tpyo": "typo"})
+
+        with tempfile.TemporaryDirectory() as d:
+            paths = []
+            for i in range(5):
+                path = os.path.join(d, "f{}.txt".format(i))
+                with open(path, "w") as f:
+                    f.write("tpyo {}\n".format(i))
+                paths.append(path)
+
+            read_ahead = {}
+            scans = list(c.read_ahead_scans(c.scan_files(paths, typos), read_ahead))
+            self.assertEqual(sorted(read_ahead), paths)
+
+            # A file changed since it was read ahead is read again
+            with open(paths[1], "w") as f:
+                f.write("tpyo changed\n")
+
+            scans = prefetch(iter(scans), 2)
+            c.review_scans(scans, typos, AlwaysRespondAccept(), read_ahead)
+
+            self.assertEqual(read_ahead, {})
+            with open(paths[0]) as f:
+                self.assertEqual(f.read(), "typo 0\n")
+            with open(paths[1]) as f:
+                self.assertEqual(f.read(), "typo changed\n")
+
+
+def run_corrector(d, *args, answers=""):
+    """Run the corrector in `d`, with its own cache; returns its exit status and stdout"""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.path.abspath(root),
+        TYPOCHECKER_CACHE_DIR=os.path.join(d, "cache"),
+    )
+
+    proc = subprocess.run(
+        [sys.executable, "-m", "typochecker.corrector"] + list(args),
+        input=answers.encode(),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        cwd=d,
+        env=env,
+    )
+    return proc.returncode, proc.stdout.decode()
+
+
+class TestPipedFileList(unittest.TestCase):
+    def test_file_names_are_not_taken_as_answers(self):
+        with tempfile.TemporaryDirectory() as d:
+            with open(os.path.join(d, "a.txt"), "w") as f:
+                f.write("teh cat\n")
+
+            # As with `git ls-files | corrector.py`
+            names = "a.txt\n" + "".join("f{}.txt\n".format(i) for i in range(30))
+            for prefetch_size in ["0", "8"]:
+                status, _ = run_corrector(
+                    d,
+                    "--no-cache",
+                    "--no-decisions",
+                    "--prefetch",
+                    prefetch_size,
+                    answers=names,
+                )
+                self.assertEqual(status, 0)
+
+                with open(os.path.join(d, "a.txt")) as f:
+                    self.assertEqual(f.read(), "teh cat\n")
+
+
+class TestIgnoredWordsAreNotCached(unittest.TestCase):
+    def get_reported(self, d, *args):
+        _, out = run_corrector(d, "--report", "-", "-d", "tree", *args)
+        return sorted(json.loads(line)["path"] for line in out.splitlines())
+
+    def test_reports_after_ignoring(self):
+        for review_args in [
+            # Ignored in an earlier run (and remembered)
+            ["--decisions", "decisions.sqlite3"],
+            # Ignored in a run, while later files are still being scanned
+            ["--no-decisions", "--prefetch", "0"],
+        ]:
+            with tempfile.TemporaryDirectory() as d:
+                os.mkdir(os.path.join(d, "tree"))
+                with open(os.path.join(d, "tree", "a.txt"), "w") as f:
+                    f.write("teh cat\n")
+                if "--no-decisions" in review_args:
+                    with open(os.path.join(d, "tree", "b.txt"), "w") as f:
+                        f.write("teh dog\n")
+
+                run_corrector(d, "-d", "tree", *review_args, answers="!i\n")
+
+                with open(os.path.join(d, "tree", "b.txt"), "w") as f:
+                    f.write("teh dog\n")
+                run_corrector(d, "-d", "tree", *review_args)
+
+                expected = [
+                    os.path.join("tree", "a.txt"),
+                    os.path.join("tree", "b.txt"),
+                ]
+                self.assertEqual(self.get_reported(d), expected)
+                self.assertEqual(self.get_reported(d, "--no-cache"), expected)
+
+
 if __name__ == "__main__":
     unittest.main()
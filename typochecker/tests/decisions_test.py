@@ -0,0 +1,123 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import typochecker.corrector as c
+from typochecker.decisions import DecisionStore, RememberingResponse
+from typochecker.suggestion_response import (
+    Ignore,
+    Keep,
+    Literal,
+    Quit,
+    SuggestionResponse,
+)
+from typochecker.typo_index import TypoIndex
+
+
+class ScriptedResponse(SuggestionResponse):
+    """Answer each typo as scripted, counting the prompts"""
+
+    def __init__(self, answers):
+        super().__init__()
+        self.answers = answers
+        self.prompts = 0
+
+    def get_response(self, line, typo_span, suggestion, orig, prompt):
+        self.prompts += 1
+        return self.answers[orig]
+
+
+class TestDecisionStore(unittest.TestCase):
+    def test_answers_are_reused_across_runs(self):
+        lines = ["keep tpyo here\n", "fix teh one\n", "and tpyo here\n"]
+        answers = {"tpyo": Keep(), "teh": Literal("the")}
+
+        with tempfile.TemporaryDirectory() as d:
+            loc = os.path.join(d, "decisions.sqlite3")
+
+            user = ScriptedResponse(answers)
+            with DecisionStore(loc) as store, contextlib.redirect_stdout(io.StringIO()):
+                fixed, _ = c.iterate_over_lines(
+                    lines,
+                    TypoIndex({"tpyo": "typo", "teh": "the"}),
+                    ["tpyo", "teh"],
+                    RememberingResponse(user, store),
+                )
+            self.assertEqual(user.prompts, 3)
+            self.assertEqual(fixed[1], "fix the one\n")
+
+            # Only the typo kept in a line that has changed is asked about again
+            user = ScriptedResponse({"tpyo": Quit()})
+            lines[0] = "keep tpyo here, too\n"
+            with DecisionStore(loc) as store, contextlib.redirect_stdout(io.StringIO()):
+                fixed, _ = c.iterate_over_lines(
+                    lines[1:],
+                    TypoIndex({"tpyo": "typo", "teh": "the"}),
+                    ["tpyo", "teh"],
+                    RememberingResponse(user, store),
+                )
+                self.assertEqual(user.prompts, 0)
+                self.assertEqual(store.hits, 2)
+                self.assertEqual(fixed[0], "fix the one\n")
+
+                res = RememberingResponse(user, store).get_response(
+                    lines[0], (5, 9), "typo", "tpyo", ""
+                )
+                self.assertIsInstance(res, Quit)
+                self.assertEqual(user.prompts, 1)
+
+    def test_ignored_words(self):
+        with tempfile.TemporaryDirectory() as d:
+            loc = os.path.join(d, "decisions.sqlite3")
+
+            with DecisionStore(loc) as store:
+                store.put("tpyo", "typo", "a tpyo", Ignore("tpyo"))
+                store.put("teh", "the", "teh end", Quit())
+
+            with DecisionStore(loc) as store:
+                self.assertEqual(store.get_ignored(), {"tpyo"})
+                self.assertIsInstance(store.get("tpyo", "typo", "elsewhere"), Ignore)
+                self.assertIsNone(store.get("teh", "the", "teh end"))
+
+
+class TestOpenDecisions(unittest.TestCase):
+    def get_args(self, d, **kwargs):
+        args = dict(
+            dir=d,
+            decisions=os.path.join(d, "decisions.sqlite3"),
+            no_decisions=False,
+            report=False,
+            ignore_all=False,
+            replay_session=None,
+        )
+        args.update(kwargs)
+        return argparse.Namespace(**args)
+
+    def test_only_a_person_uses_earlier_answers(self):
+        with tempfile.TemporaryDirectory() as d:
+            with DecisionStore(os.path.join(d, "decisions.sqlite3")) as store:
+                store.put("tpyo", "typo", "a tpyo", Ignore("tpyo"))
+
+            for kwargs in [
+                dict(report=True),
+                dict(ignore_all=True),
+                dict(replay_session=os.path.join(d, "session.json")),
+                dict(no_decisions=True),
+            ]:
+                typos = TypoIndex({"tpyo": "typo", "teh": "the"})
+                self.assertIsNone(c.open_decisions(self.get_args(d, **kwargs), typos))
+                self.assertIn("tpyo", typos)
+
+            typos = TypoIndex({"tpyo": "typo", "teh": "the"})
+            with c.open_decisions(self.get_args(d), typos) as store:
+                self.assertIsInstance(
+                    c.get_responder(self.get_args(d), store), RememberingResponse
+                )
+            self.assertEqual(list(typos), ["teh"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+
+from typochecker.git_source import CatFile, iter_diff_typos, iter_index_typos
+from typochecker.scan_cache import ScanCache
+
+
+def git(cwd, *args):
+    subprocess.check_output(["git"] + list(args), cwd=cwd)
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class TestDiffTypos(unittest.TestCase):
+    def test_only_changed_lines(self):
+        typos = {"teh": "the", "acheive": "achieve", "wich": "which, witch"}
+
+        with tempfile.TemporaryDirectory() as d:
+            git(d, "init", "-q")
+            git(d, "config", "user.email", "typochecker@example.com")
+            git(d, "config", "user.name", "typochecker")
+
+            with open(os.path.join(d, "a.txt"), "w") as f:
+                f.write("teh first\nclean\n")
+            git(d, "add", "a.txt")
+            git(d, "commit", "-qm", "first")
+
+            with open(os.path.join(d, "a.txt"), "a") as f:
+                f.write("acheive\n")
+            with open(os.path.join(d, "b.txt"), "w") as f:
+                f.write("Wich one\n")
+            git(d, "add", "b.txt")
+
+            staged = list(iter_diff_typos(["--cached"], typos, cwd=d))
+            unstaged = list(iter_diff_typos(["HEAD"], typos, cwd=d))
+
+        self.assertEqual(staged, [("b.txt", 1, 1, "Wich")])
+        self.assertEqual(
+            unstaged, [("a.txt", 3, 1, "acheive"), ("b.txt", 1, 1, "Wich")]
+        )
+
+    def test_names_with_spaces_and_lines_like_headers(self):
+        typos = {"teh": "the"}
+
+        with tempfile.TemporaryDirectory() as d:
+            git(d, "init", "-q")
+            for name, text in [
+                ("my notes.txt", "teh notes\n"),
+                ("plain.txt", "++ teh\n+++ b/other.txt\nteh end\n"),
+                ('\u00e9t\u00e9 "q".txt', "teh summer\n"),
+            ]:
+                with open(os.path.join(d, name), "w") as f:
+                    f.write(text)
+            git(d, "add", ".")
+
+            staged = list(iter_diff_typos(["--cached"], typos, cwd=d))
+
+        self.assertEqual(
+            staged,
+            [
+                ("my notes.txt", 1, 1, "teh"),
+                ("plain.txt", 1, 4, "teh"),
+                ("plain.txt", 3, 1, "teh"),
+                ('\u00e9t\u00e9 "q".txt', 1, 1, "teh"),
+            ],
+        )
+
+    def test_from_a_subdirectory(self):
+        typos = {"teh": "the", "tpyo": "typo"}
+
+        with tempfile.TemporaryDirectory() as d:
+            sub = os.path.join(d, "sub")
+            os.mkdir(sub)
+            git(d, "init", "-q")
+            git(d, "config", "user.email", "typochecker@example.com")
+            git(d, "config", "user.name", "typochecker")
+
+            for name in ["a.txt", os.path.join("sub", "b.txt")]:
+                with open(os.path.join(d, name), "w") as f:
+                    f.write("clean\n")
+            git(d, "add", ".")
+            git(d, "commit", "-qm", "first")
+
+            # Changes only in the working tree are read from disk
+            for name in ["a.txt", os.path.join("sub", "b.txt")]:
+                with open(os.path.join(d, name), "a") as f:
+                    f.write("teh end\n")
+
+            unstaged = list(iter_diff_typos(["HEAD"], typos, cwd=sub))
+            git(d, "add", ".")
+            staged = list(iter_index_typos(typos, cwd=sub))
+
+        expected = [("a.txt", 2, 1, "teh"), ("sub/b.txt", 2, 1, "teh")]
+        self.assertEqual(unstaged, expected)
+        self.assertEqual(staged, expected)
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class TestCatFile(unittest.TestCase):
+    def test_close_after_reading_part(self):
+        with tempfile.TemporaryDirectory() as d:
+            git(d, "init", "-q")
+            blobs = []
+            for i in range(20):
+                # More, in all, than fits in a pipe
+                data = "{}\n".format(i).encode() * (1 << 14)
+                blobs.append(
+                    subprocess.check_output(
+                        ["git", "hash-object", "-w", "--stdin"], input=data, cwd=d
+                    )
+                    .decode()
+                    .strip()
+                )
+
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+
+                with CatFile(d) as cat_file:
+                    objects = cat_file.iter_objects(blobs)
+                    self.assertEqual(next(objects)[1][:2], b"0\n")
+                    objects.close()
+
+                proc = cat_file.proc
+                del cat_file, objects
+
+            self.assertIsNotNone(proc.returncode)
+            self.assertTrue(proc.stdout.closed)
+            self.assertEqual(
+                [w for w in caught if issubclass(w.category, ResourceWarning)], []
+            )
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class TestIndexTypos(unittest.TestCase):
+    def test_staged_blobs(self):
+        typos = {"teh": "the", "tpyo": "typo"}
+
+        with tempfile.TemporaryDirectory() as d:
+            git(d, "init", "-q")
+            for name, text in [
+                ("a.txt", "teh first\nclean\n"),
+                ("copy.txt", "teh first\nclean\n"),
+                ("clean.txt", "nothing here\n"),
+                ("fixed.txt", "a tpyo\n"),
+            ]:
+                with open(os.path.join(d, name), "w") as f:
+                    f.write(text)
+            git(d, "add", ".")
+
+            # Only the staged version counts, typo or not
+            with open(os.path.join(d, "fixed.txt"), "w") as f:
+                f.write("a typo\n")
+            with open(os.path.join(d, "clean.txt"), "a") as f:
+                f.write("tpyo\n")
+
+            expected = [
+                ("a.txt", 1, 1, "teh"),
+                ("copy.txt", 1, 1, "teh"),
+                ("fixed.txt", 1, 3, "tpyo"),
+            ]
+            cache_loc = os.path.join(d, "cache", "scans.sqlite3")
+
+            with mock.patch.object(
+                CatFile, "iter_objects", autospec=True, side_effect=CatFile.iter_objects
+            ) as iter_objects:
+                with ScanCache(cache_loc, "v1") as cache:
+                    self.assertEqual(
+                        list(iter_index_typos(typos, cwd=d, cache=cache)), expected
+                    )
+                # The copy is the same blob, so is only read once
+                self.assertEqual(len(list(iter_objects.call_args[0][1])), 3)
+
+                # The clean blob is not read again
+                with ScanCache(cache_loc, "v1") as cache:
+                    self.assertEqual(
+                        list(iter_index_typos(typos, cwd=d, cache=cache)), expected
+                    )
+                self.assertEqual(len(list(iter_objects.call_args[0][1])), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
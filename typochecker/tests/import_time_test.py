@@ -0,0 +1,30 @@
+import subprocess
+import sys
+import unittest
+
+# Budget (in seconds) for importing the corrector; it is run by pre-commit hooks
+# many times a day, so startup must not pay for reading the dictionaries
+IMPORT_TIME_BUDGET = 0.5
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import typochecker.corrector
+elapsed = time.perf_counter() - start
+import typochecker.utils as u
+print(elapsed, u.get_words.cache_info().currsize, u.load_dictionary.cache_info().currsize)
+"""
+
+
+class TestImportTime(unittest.TestCase):
+    def test_import_is_lazy_and_fast(self):
+        out = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT])
+        elapsed, words_loaded, dicts_loaded = out.decode().split()
+
+        self.assertEqual(words_loaded, "0")
+        self.assertEqual(dicts_loaded, "0")
+        self.assertLess(float(elapsed), IMPORT_TIME_BUDGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
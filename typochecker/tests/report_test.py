@@ -0,0 +1,111 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from typochecker.report import write_report
+from typochecker.scanner import scan_files
+from typochecker.typo_index import TypoIndex
+
+
+def write_tree(d, files):
+    paths = []
+    for name, contents in files:
+        path = os.path.join(d, name)
+        with open(path, "wb") as f:
+            f.write(contents)
+        paths.append(path)
+    return paths
+
+
+class TestWriteReport(unittest.TestCase):
+    def test_records(self):
+        typos = TypoIndex({"teh": "the", "wich": "which, witch"})
+
+        with tempfile.TemporaryDirectory() as d:
+            paths = write_tree(
+                d,
+                [
+                    ("a.txt", b"first line\nTeh end, or\r\n  wich one\n"),
+                    ("clean.txt", b"nothing here\n"),
+                    ("a.bin", b"teh\0"),
+                ],
+            )
+
+            out = io.StringIO()
+            cnt = write_report(scan_files(paths, typos), typos, out)
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(cnt, 2)
+        self.assertEqual(
+            records,
+            [
+                {
+                    "path": paths[0],
+                    "line": 2,
+                    "column": 1,
+                    "typo": "Teh",
+                    "suggestions": ["The"],
+                },
+                {
+                    "path": paths[0],
+                    "line": 3,
+                    "column": 3,
+                    "typo": "wich",
+                    "suggestions": ["which", "witch"],
+                },
+            ],
+        )
+
+
+class TestReportCommand(unittest.TestCase):
+    def run_report(self, d, *args):
+        root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.path.abspath(root),
+            TYPOCHECKER_CACHE_DIR=os.path.join(d, "cache"),
+        )
+
+        proc = subprocess.run(
+            [sys.executable, "-m", "typochecker.corrector", "--report", "-"]
+            + ["--no-cache"]
+            + list(args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+        )
+        records = [json.loads(line) for line in proc.stdout.decode().splitlines()]
+
+        return proc.returncode, records
+
+    def test_exit_status(self):
+        with tempfile.TemporaryDirectory() as d:
+            tree = os.path.join(d, "tree")
+            os.mkdir(tree)
+            write_tree(tree, [("a.txt", b"ok\nteh end\n"), ("b.txt", b"ok\n")])
+
+            status, records = self.run_report(d, "-d", tree)
+            self.assertEqual(status, 1)
+            self.assertEqual(
+                records,
+                [
+                    {
+                        "path": os.path.join(tree, "a.txt"),
+                        "line": 2,
+                        "column": 1,
+                        "typo": "teh",
+                        "suggestions": ["the"],
+                    }
+                ],
+            )
+
+            write_tree(tree, [("a.txt", b"ok\nthe end\n")])
+            self.assertEqual(self.run_report(d, "-d", tree), (0, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import typochecker.scan_cache as sc
+import typochecker.scanner as s
+from typochecker.scan_cache import ScanCache
+from typochecker.stats import Stats
+
+
+class TestScanCache(unittest.TestCase):
+    def test_unchanged_and_identical_files_are_not_rescanned(self):
+        typos = {"tpyo": "typo"}
+
+        with tempfile.TemporaryDirectory() as d:
+            paths = [os.path.join(d, name) for name in ["a.txt", "b.txt", "c.txt"]]
+            for path, text in zip(paths, ["tpyo\n", "tpyo\n", "ok\n"]):
+                with open(path, "w") as f:
+                    f.write(text)
+
+            cache_loc = os.path.join(d, "cache", "scans.sqlite3")
+
+            with mock.patch.object(s, "scan_file", wraps=s.scan_file) as scan_file:
+                with ScanCache(cache_loc, "v1") as cache:
+                    first = list(s.scan_files(paths, typos, cache=cache))
+
+                # b.txt has the same contents as a.txt
+                self.assertEqual(scan_file.call_count, 2)
+
+                with ScanCache(cache_loc, "v1") as cache:
+                    self.assertEqual(
+                        list(s.scan_files(paths, typos, cache=cache)), first
+                    )
+                self.assertEqual(scan_file.call_count, 2)
+
+                # A new typo table invalidates every result
+                with ScanCache(cache_loc, "v2") as cache:
+                    list(s.scan_files(paths, typos, cache=cache))
+                self.assertEqual(scan_file.call_count, 4)
+
+        self.assertEqual([scan.typos for scan in first], [["tpyo"], ["tpyo"], []])
+
+    def test_relative_paths_in_different_trees(self):
+        typos = {"tpyo": "typo"}
+
+        with tempfile.TemporaryDirectory() as d:
+            cache_loc = os.path.join(d, "cache", "scans.sqlite3")
+            trees = [os.path.join(d, "one"), os.path.join(d, "two")]
+
+            # Same name, size and mtime; only the contents differ
+            for tree, text in zip(trees, ["tpyo\n", "typo\n"]):
+                os.mkdir(tree)
+                with open(os.path.join(tree, "a.txt"), "w") as f:
+                    f.write(text)
+                os.utime(os.path.join(tree, "a.txt"), ns=(10**18, 10**18))
+
+            cwd = os.getcwd()
+            try:
+                scans = []
+                for tree in trees:
+                    os.chdir(tree)
+                    with ScanCache(cache_loc, "v1") as cache:
+                        scans += list(s.scan_files(["a.txt"], typos, cache=cache))
+            finally:
+                os.chdir(cwd)
+
+            self.assertEqual([scan.typos for scan in scans], [["tpyo"], []])
+
+            # Results for earlier tables are dropped
+            with ScanCache(cache_loc, "v2") as cache:
+                tables = cache.conn.execute(
+                    "SELECT DISTINCT table_key FROM results"
+                ).fetchall()
+            self.assertEqual(tables, [])
+
+    def test_workers_hash_and_identical_files_are_scanned_once(self):
+        typos = {"tpyo": "typo", "teh": "the"}
+        texts = ["tpyo\n", "teh\n", "tpyo\n", "teh\n", "ok\n"]
+
+        with tempfile.TemporaryDirectory() as d:
+            paths = [os.path.join(d, "f{}.txt".format(i)) for i in range(len(texts))]
+            for path, text in zip(paths, texts):
+                with open(path, "w") as f:
+                    f.write(text)
+
+            cache_loc = os.path.join(d, "cache", "scans.sqlite3")
+
+            # Files are only hashed in the workers (where calls are not counted)
+            with mock.patch.object(
+                sc, "get_file_digest", wraps=sc.get_file_digest
+            ) as get_file_digest:
+                for expected_scans in [3, 0]:
+                    stats = Stats()
+                    with ScanCache(cache_loc, "v1") as cache:
+                        scans = list(
+                            s.scan_files(
+                                paths,
+                                typos,
+                                jobs=2,
+                                chunksize=2,
+                                cache=cache,
+                                stats=stats,
+                            )
+                        )
+
+                    self.assertEqual([scan.path for scan in scans], paths)
+                    self.assertEqual(
+                        [scan.typos for scan in scans],
+                        [["tpyo"], ["teh"], ["tpyo"], ["teh"], []],
+                    )
+                    self.assertEqual(stats.counts["files_scanned"], expected_scans)
+
+            self.assertEqual(get_file_digest.call_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+from typochecker.scanner import CHUNK_SIZE, get_typos_in_file, scan_files
+from typochecker.stats import Stats
+
+
+class TestParallelScan(unittest.TestCase):
+    def test_matches_serial(self):
+        typos = {"tpyo": "typo", "teh": "the"}
+
+        with tempfile.TemporaryDirectory() as d:
+            paths = []
+            for i in range(50):
+                path = os.path.join(d, "f{}.txt".format(i))
+                with open(path, "w") as f:
+                    f.write("Teh tpyo\n" if i % 3 else "nothing here\n")
+                paths.append(path)
+            paths.append(os.path.join(d, "missing.txt"))
+
+            serial = list(scan_files(paths, typos))
+            parallel = list(scan_files(paths, typos, jobs=3, chunksize=4))
+
+        self.assertEqual(serial, parallel)
+        self.assertEqual([s.path for s in parallel], paths)
+        self.assertEqual(parallel[1].typos, ["Teh", "tpyo"])
+        self.assertEqual(parallel[-1].error, "unreadable")
+
+
+class TestScanStats(unittest.TestCase):
+    def test_costs_recorded_in_both_modes(self):
+        typos = {"tpyo": "typo"}
+
+        with tempfile.TemporaryDirectory() as d:
+            paths = []
+            for i, contents in enumerate([b"tpyo\n", b"ok\n", b"\0binary"]):
+                path = os.path.join(d, "f{}".format(i))
+                with open(path, "wb") as f:
+                    f.write(contents)
+                paths.append(path)
+
+            for jobs in [1, 2]:
+                stats = Stats()
+                scans = list(scan_files(paths, typos, jobs=jobs, stats=stats))
+
+                self.assertEqual(scans[0].typos, ["tpyo"])
+                self.assertEqual(stats.counts["files_scanned"], 2)
+                self.assertEqual(stats.counts["files_skipped.binary"], 1)
+                self.assertEqual(stats.counts["bytes_read"], 15)
+                self.assertEqual(len(stats.slowest), 3)
+
+
+class TestEncodings(unittest.TestCase):
+    def test_non_utf8_and_split_characters(self):
+        typos = {"tpyo": "typo", "caff\u00e9": "caf\u00e9"}
+
+        with tempfile.TemporaryDirectory() as d:
+            latin1 = os.path.join(d, "latin1.txt")
+            with open(latin1, "wb") as f:
+                f.write("Caff\u00e9\u00bb tpyo\n".encode("latin-1"))
+
+            # A multi-byte character straddling two chunks
+            utf8 = os.path.join(d, "utf8.txt")
+            with open(utf8, "wb") as f:
+                f.write(b"x" * (CHUNK_SIZE - 5) + " caff\u00e9 ok\n".encode("utf-8"))
+
+            self.assertEqual(get_typos_in_file(latin1, typos), ["Caff\u00e9", "tpyo"])
+            self.assertEqual(get_typos_in_file(utf8, typos), ["caff\u00e9"])
+
+
+if __name__ == "__main__":
+    unittest.main()
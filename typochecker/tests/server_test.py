@@ -0,0 +1,60 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from typochecker.checker import Checker
+from typochecker.client import Client
+from typochecker.server import CheckServer, is_listening
+from typochecker.typo_index import TypoIndex
+
+
+class TestServer(unittest.TestCase):
+    def test_requests_over_one_connection(self):
+        typos = TypoIndex({"tpyo": "typo", "teh": "the"})
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "a.txt")
+            with open(path, "w") as f:
+                f.write("ok\nTeh tpyo\n")
+            binary = os.path.join(d, "a.bin")
+            with open(binary, "wb") as f:
+                f.write(b"tpyo\0")
+
+            loc = os.path.join(d, "server.sock")
+            server = CheckServer(loc, Checker(typos))
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+
+            try:
+                self.assertTrue(is_listening(loc))
+                self.assertEqual(os.stat(loc).st_mode & 0o777, 0o600)
+
+                with Client(loc) as client:
+                    response = client.check_path(path)
+                    self.assertEqual(
+                        [
+                            (r["line"], r["column"], r["typo"])
+                            for r in response["typos"]
+                        ],
+                        [(2, 1, "Teh"), (2, 5, "tpyo")],
+                    )
+                    self.assertEqual(response["typos"][0]["suggestions"], ["The"])
+
+                    response = client.check_text("a tpyo", "draft.md")
+                    self.assertEqual(response["typos"][0]["path"], "draft.md")
+
+                    self.assertEqual(client.check_path(binary), {"skipped": "binary"})
+                    self.assertIn("error", client.check_path(path + ".missing"))
+                    self.assertEqual(
+                        client.request({"text": "ok", "id": 7}), {"typos": [], "id": 7}
+                    )
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        self.assertFalse(is_listening(loc))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import threading
+import time
+import unittest
+
+from typochecker.stats import PER_THREAD_CPU, Stats
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestStats(unittest.TestCase):
+    @unittest.skipUnless(
+        PER_THREAD_CPU, "CPU time is only told apart per thread on Linux"
+    )
+    def test_busy_thread_is_not_charged_to_waiting_phase(self):
+        stats = Stats()
+
+        busy = threading.Thread(target=spin, args=(0.3,))
+        with stats.phase("prompt"):
+            busy.start()
+            busy.join()
+
+        wall, cpu = stats.phases["prompt"]
+        self.assertGreaterEqual(wall, 0.3)
+        self.assertLess(cpu, 0.1)
+
+    def test_disabled(self):
+        stats = Stats(enabled=False)
+
+        with stats.phase("review"):
+            items = list(stats.timed_iter("scan", [1, 2]))
+
+        self.assertEqual(items, [1, 2])
+        self.assertEqual(stats.phases, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
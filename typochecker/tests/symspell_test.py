@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from typochecker.symspell import SymSpellIndex, load_index
+from typochecker.utils import edits1, edits2
+
+WORDS = [
+    "accommodate",
+    "achieve",
+    "archive",
+    "believe",
+    "definitely",
+    "necessary",
+    "receive",
+    "separate",
+    "spelling",
+    "typo",
+    "type",
+]
+
+
+class TestSymSpellIndex(unittest.TestCase):
+    def test_matches_brute_force(self):
+        index = SymSpellIndex.build(WORDS)
+        words = set(WORDS)
+
+        for word in ["achive", "recieve", "seperate", "definately", "tpyo", "xyzzy"]:
+            self.assertEqual(index.lookup(word, 1), set(edits1(word)) & words)
+            self.assertEqual(
+                index.lookup(word, 2),
+                (set(edits1(word)) | set(edits2(word))) & words,
+            )
+
+    def test_persisted(self):
+        with tempfile.TemporaryDirectory() as d:
+            dict_loc = os.path.join(d, "words")
+            with open(dict_loc, "w") as f:
+                f.write("\n".join(WORDS))
+
+            built = load_index([dict_loc], lambda: WORDS, d)
+            self.assertEqual(len(os.listdir(d)), 2)
+
+            # Served from disk, without asking for the words again
+            loaded = load_index([dict_loc], lambda: [], d)
+            self.assertEqual(loaded.words, built.words)
+            self.assertEqual(loaded.candidates("recieve"), {"receive"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+import typochecker.typo_table as tt
+
+
+class TestCompiledTypos(unittest.TestCase):
+    def test_cache_invalidation(self):
+        with tempfile.TemporaryDirectory() as d:
+            typos_loc = os.path.join(d, "typos.txt")
+            cache_dir = os.path.join(d, "cache")
+
+            with open(typos_loc, "w") as f:
+                f.write("tpyo->typo\n")
+
+            typos = tt.load_typos([typos_loc], cache_dir=cache_dir)
+            self.assertEqual(typos["tpyo"], "typo")
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            # Served from the compiled table
+            self.assertEqual(tt.load_typos([typos_loc], cache_dir=cache_dir), typos)
+
+            # Changing the source, or the whitelist, compiles a new table
+            with open(typos_loc, "a") as f:
+                f.write("teh->the\n")
+
+            typos = tt.load_typos([typos_loc], cache_dir=cache_dir)
+            self.assertIn("teh", typos)
+
+            typos = tt.load_typos([typos_loc], whitelist=["Teh"], cache_dir=cache_dir)
+            self.assertNotIn("teh", typos)
+
+            # Tables for other whitelists are kept; only older versions of a
+            # table (for the same whitelist) are replaced
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+            with open(typos_loc, "a") as f:
+                f.write("wich->which\n")
+
+            typos = tt.load_typos([typos_loc], whitelist=["Teh"], cache_dir=cache_dir)
+            self.assertIn("wich", typos)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+            typos = tt.load_typos([typos_loc], cache_dir=cache_dir)
+            self.assertIn("teh", typos)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
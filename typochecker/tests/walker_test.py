@@ -0,0 +1,91 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from typochecker.utils import iter_visible_files
+
+
+class TestVisibleFiles(unittest.TestCase):
+    def test_prunes_hidden_and_ignored(self):
+        with tempfile.TemporaryDirectory() as d:
+            for path in [
+                ".git/objects/ab",
+                ".venv/lib.py",
+                "node_modules/pkg/index.js",
+                "src/a.py",
+                "src/debug.log",
+                "src/keep.log",
+                "src/build/out.py",
+                ".flake8",
+            ]:
+                os.makedirs(os.path.join(d, os.path.dirname(path)), exist_ok=True)
+                open(os.path.join(d, path), "w").close()
+
+            with open(os.path.join(d, ".gitignore"), "w") as f:
+                f.write("node_modules/\n*.log\n!keep.log\n")
+            with open(os.path.join(d, "src", ".gitignore"), "w") as f:
+                f.write("/build\n")
+
+            found = [os.path.relpath(f, d) for f in iter_visible_files(d)]
+
+        self.assertEqual(
+            found,
+            [
+                ".flake8",
+                ".gitignore",
+                os.path.join("src", ".gitignore"),
+                os.path.join("src", "a.py"),
+                os.path.join("src", "keep.log"),
+            ],
+        )
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class TestOuterIgnores(unittest.TestCase):
+    def test_walking_a_subdirectory(self):
+        with tempfile.TemporaryDirectory() as d:
+            subprocess.check_output(["git", "init", "-q"], cwd=d)
+            excludes_loc = os.path.join(d, "excludes")
+            subprocess.check_output(
+                ["git", "config", "core.excludesFile", excludes_loc], cwd=d
+            )
+
+            for path in [
+                "src/a.py",
+                "src/debug.log",
+                "src/keep.log",
+                "src/secret.txt",
+                "src/notes.swp",
+                "src/lib/gen.py",
+                "src/lib/b.py",
+            ]:
+                os.makedirs(os.path.join(d, os.path.dirname(path)), exist_ok=True)
+                open(os.path.join(d, path), "w").close()
+
+            with open(excludes_loc, "w") as f:
+                f.write("*.swp\n")
+            with open(os.path.join(d, ".git", "info", "exclude"), "w") as f:
+                f.write("secret.txt\n")
+            with open(os.path.join(d, ".gitignore"), "w") as f:
+                f.write("*.log\n/src/lib/gen.py\n")
+            with open(os.path.join(d, "src", ".gitignore"), "w") as f:
+                f.write("!keep.log\n")
+
+            src = os.path.join(d, "src")
+            found = [os.path.relpath(f, src) for f in iter_visible_files(src)]
+
+        self.assertEqual(
+            found,
+            [
+                ".gitignore",
+                "a.py",
+                "keep.log",
+                os.path.join("lib", "b.py"),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
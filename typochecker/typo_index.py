@@ -0,0 +1,98 @@
+import re
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+
+TypoSource = Union[Mapping[str, str], Iterable[Tuple[str, str]]]
+
+# Start of each alternative in a suggestion such as "achieve, archive"
+ALTERNATIVE_START_RE = re.compile(r"(^|,\s*)(\w)")
+
+
+def match_case(word: str, suggestion: str) -> str:
+    """
+    Apply the casing pattern of `word` (as found in the text) to `suggestion`
+
+    >>> match_case('tpyo', 'typo')
+    'typo'
+    >>> match_case('amercia', 'America')
+    'America'
+    >>> match_case('Achive', 'achieve, archive')
+    'Achieve, Archive'
+    >>> match_case('ACHIVE', 'achieve, archive')
+    'ACHIEVE, ARCHIVE'
+    >>> match_case('tPyo', 'typo')
+    'tYpo'
+    """
+    if word.islower():
+        return suggestion
+    elif word.isupper() and len(word) > 1:
+        return suggestion.upper()
+    elif word[:1].isupper() and (word[1:].islower() or len(word) == 1):
+        return ALTERNATIVE_START_RE.sub(
+            lambda m: m.group(1) + m.group(2).upper(), suggestion
+        )
+
+    # Mixed case: copy the case of each character, position by position
+    return "".join(
+        c.upper() if i < len(word) and word[i].isupper() else c
+        for i, c in enumerate(suggestion)
+    )
+
+
+class TypoIndex(dict):
+    """
+    Typos keyed by their lowercase spelling, so that each entry is stored once;
+    lookups are case-insensitive, and `suggest` restores the casing of the
+    word found in the text
+
+    >>> typos = TypoIndex({'tpyo': 'typo', 'Amercia': 'America'})
+    >>> 'TPYO' in typos, 'amercia' in typos, 'typo' in typos
+    (True, True, False)
+    >>> typos.suggest('Tpyo'), typos.suggest('AMERCIA')
+    ('Typo', 'AMERICA')
+    >>> typos.pop('Tpyo')
+    'typo'
+    >>> 'tpyo' in typos
+    False
+    """
+
+    def __init__(self, typos: Optional[TypoSource] = None) -> None:
+        super().__init__()
+        self.update(typos or {})
+
+        # Identifies the compiled table these typos came from, if any
+        self.version: Optional[str] = None
+
+    @classmethod
+    def from_folded(cls, typos: Dict[str, str]) -> "TypoIndex":
+        """Wrap typos whose keys are known to be lowercase already"""
+        index = cls()
+        dict.update(index, typos)
+        return index
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and super().__contains__(word.lower())
+
+    def __getitem__(self, word: str) -> str:
+        return super().__getitem__(word.lower())
+
+    def __setitem__(self, word: str, suggestion: str) -> None:
+        super().__setitem__(word.lower(), suggestion)
+
+    def __delitem__(self, word: str) -> None:
+        super().__delitem__(word.lower())
+
+    def get(self, word, default=None):
+        return super().get(word.lower(), default)
+
+    def pop(self, word, *default):
+        return super().pop(word.lower(), *default)
+
+    def update(self, typos: TypoSource = (), **kwargs: str) -> None:
+        items = typos.items() if isinstance(typos, Mapping) else typos
+        for word, suggestion in items:
+            self[word] = suggestion
+        for word, suggestion in kwargs.items():
+            self[word] = suggestion
+
+    def suggest(self, word: str) -> str:
+        return match_case(word, self[word])
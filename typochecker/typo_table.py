@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import marshal
+import os
+import re
+import tempfile
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from typochecker.typo_index import TypoIndex
+from typochecker.utils import get_cache_dir, parse_typos_file
+
+# Bump whenever the contents/layout of the compiled table changes
+TYPO_TABLE_VERSION = 2
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "data")
+
+# By default, use typos gathered at
+# https://en.wikipedia.org/wiki/Wikipedia:Lists_of_common_misspellings/For_machines
+DEFAULT_TYPO_LOCS = (
+    os.path.join(DATA_DIR, "wikipedia_common_misspellings.txt"),
+    os.path.join(DATA_DIR, "extra_endings.txt"),
+)
+
+CACHE_PREFIX = "typos-"
+CACHE_SUFFIX = ".marshal"
+
+
+def get_whitelist_words(
+    words: Optional[Iterable[str]] = None, files: Optional[Iterable[str]] = None
+) -> List[str]:
+    """
+    Gather whitelisted words, given directly and via files, lowercased
+
+    >>> get_whitelist_words(['Foo', 'bar'])
+    ['bar', 'foo']
+    """
+    whitelist = set(w.lower() for w in words or [])
+
+    for whitelist_file in files or []:
+        try:
+            with open(whitelist_file, "r") as ff:
+                lines = ff.readlines()
+        except OSError:
+            print(
+                "Encountered problem while trying to trying to read whitelist file {}".format(
+                    whitelist_file
+                )
+            )
+            continue
+
+        whitelist.update(w.lower() for w in re.findall(r"[\w]+", " ".join(lines)))
+
+    return sorted(whitelist)
+
+
+def get_table_key(typo_locs: Sequence[str], whitelist: Sequence[str]) -> str:
+    """Hash of everything that goes into a compiled table"""
+    h = hashlib.sha256()
+    h.update("{}:{}".format(TYPO_TABLE_VERSION, marshal.version).encode())
+
+    for loc in typo_locs:
+        with open(loc, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+
+    h.update("\n".join(whitelist).encode())
+
+    return h.hexdigest()
+
+
+def get_inputs_key(typo_locs: Sequence[str], whitelist: Sequence[str]) -> str:
+    """
+    Hash of which typo files (by location) and whitelist a table is compiled
+    from; a table only replaces older ones with the same inputs key
+    """
+    h = hashlib.sha256()
+    for loc in typo_locs:
+        h.update(os.path.abspath(loc).encode("utf-8", "surrogateescape") + b"\0")
+
+    h.update("\n".join(whitelist).encode())
+
+    return h.hexdigest()[:16]
+
+
+def compile_typos(typo_locs: Sequence[str], whitelist: Sequence[str]) -> Dict[str, str]:
+    """
+    Parse the typo files, keyed by lowercase typo, then apply the whitelist
+    """
+    typos = {}
+    for loc in typo_locs:
+        typos.update((k.lower(), v) for k, v in parse_typos_file(loc).items())
+
+    # Remove whitelisted words from typos
+    for word in whitelist:
+        typos.pop(word, None)
+
+    return typos
+
+
+def write_compiled_typos(loc: str, typos: Dict[str, str], replaces: str) -> None:
+    """
+    Write atomically, so that concurrent runs never see a partial table; the
+    other tables whose names start with `replaces` are removed
+    """
+    cache_dir = os.path.dirname(loc)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    fd, tmp_loc = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(marshal.dumps(typos))
+        os.replace(tmp_loc, loc)
+    except OSError:
+        os.unlink(tmp_loc)
+        raise
+
+    # Remove tables compiled from older versions of the same inputs (those
+    # for other whitelists, or typo files, are still in use)
+    for fname in os.listdir(cache_dir):
+        stale = os.path.join(cache_dir, fname)
+        if fname.startswith(replaces) and fname.endswith(CACHE_SUFFIX):
+            if stale != loc:
+                try:
+                    os.unlink(stale)
+                except OSError:
+                    pass
+
+
+def read_compiled_typos(loc: str) -> Optional[Dict[str, str]]:
+    try:
+        with open(loc, "rb") as f:
+            typos = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    return typos if isinstance(typos, dict) else None
+
+
+def load_typos(
+    typo_locs: Sequence[str] = DEFAULT_TYPO_LOCS,
+    whitelist: Sequence[str] = (),
+    cache_dir: Optional[str] = None,
+) -> TypoIndex:
+    """
+    Load the compiled typo table, compiling (and caching) it if the
+    typo files or whitelist have changed since it was last compiled
+    """
+    whitelist = sorted(set(w.lower() for w in whitelist))
+    key = get_table_key(typo_locs, whitelist)
+    prefix = "{}{}-".format(CACHE_PREFIX, get_inputs_key(typo_locs, whitelist))
+    loc = os.path.join(cache_dir or get_cache_dir(), prefix + key + CACHE_SUFFIX)
+
+    typos = read_compiled_typos(loc)
+
+    if typos is None:
+        typos = compile_typos(typo_locs, whitelist)
+
+        try:
+            write_compiled_typos(loc, typos, prefix)
+        except OSError:
+            print("Could not write compiled typos to {}".format(loc))
+
+    index = TypoIndex.from_folded(typos)
+    index.version = key
+
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile the typo table ahead of time (e.g., in CI images)"
+    )
+    parser.add_argument("-w", "--whitelist_word", action="append")
+    parser.add_argument("-W", "--whitelist_file", action="append")
+    parser.add_argument("--cache-dir", help="Defaults to {}".format(get_cache_dir()))
+
+    args = parser.parse_args()
+
+    typos = load_typos(
+        whitelist=get_whitelist_words(args.whitelist_word, args.whitelist_file),
+        cache_dir=args.cache_dir,
+    )
+    print("Compiled {} typos".format(len(typos)))
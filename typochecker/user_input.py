@@ -96,7 +96,8 @@ class UserResponse(SuggestionResponse):
                 "\t!q to quit\n"
                 '\t"!" or "/" to accept suggestion\n'
                 "\tleave blank and hit Enter to leave as-is\n"
-                '\t"!i" to ignore suggestion for rest of session'
+                '\t"!i" to ignore suggestion from now on (also in later runs, '
+                "unless --no-decisions)"
             )
             return Unknown()
         elif response.re_check():
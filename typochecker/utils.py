@@ -1,7 +1,29 @@
 import os
 import re
 from collections import Counter
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, Iterator, List, Set, Tuple
+
+from typochecker.filetypes import read_text
+from typochecker.gitignore import GitIgnore, get_outer_gitignores, is_ignored
+from typochecker.symspell import SymSpellIndex, load_index
+
+# Dictionaries are only read on first use (not at import time),
+# and are shared by every caller within a process
+DICTIONARY_LOCS = (
+    "/usr/share/dict/american-english-huge",
+    "/usr/share/dict/british-english-huge",
+)
+KNOWN_WORDS_LOC = "/usr/share/dict/american-english"
+
+
+def get_cache_dir() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.environ.get("TYPOCHECKER_CACHE_DIR") or os.path.join(
+        cache_home, "typochecker"
+    )
 
 
 # <Norvig>
@@ -9,20 +31,45 @@ def wordify(text):
     return re.findall(r"\w+", text.lower())
 
 
-WORDS = Counter(wordify(open("/usr/share/dict/american-english-huge").read()))
-WORDS.update(wordify(open("/usr/share/dict/british-english-huge").read()))
+@lru_cache(maxsize=None)
+def load_dictionary(loc: str) -> Counter:
+    """Word counts of the dictionary at `loc`; empty if it cannot be read."""
+    try:
+        with open(loc, "r") as f:
+            return Counter(wordify(f.read()))
+    except OSError:
+        print("Could not read dictionary {}".format(loc))
+        return Counter()
+
 
+@lru_cache(maxsize=None)
+def get_words() -> Counter:
+    """The dictionary of WORDS, loaded lazily from `DICTIONARY_LOCS`."""
+    words = Counter()
+    for loc in DICTIONARY_LOCS:
+        words.update(load_dictionary(loc))
 
-def candidates(word):
+    return words
+
+
+@lru_cache(maxsize=None)
+def get_candidate_index() -> SymSpellIndex:
+    """Index of the dictionary of WORDS, persisted between runs"""
+    return load_index(DICTIONARY_LOCS, get_words, get_cache_dir())
+
+
+def candidates(word, max_distance: int = 1):
     """Generate possible spelling corrections for word."""
-    # Unlike Norvig's solution, does *NOT* consider distance-2 edits
+    # Like Norvig's solution, but answered from a symmetric-delete index;
+    # by default, does *NOT* consider distance-2 edits
     # return known([word]) or known(edits1(word)) or known(edits2(word)) or [word]
-    return known([word]) or known(edits1(word)) or [word]
+    return get_candidate_index().candidates(word, max_distance) or [word]
 
 
 def known(words):
     """The subset of `words` that appear in the dictionary of WORDS."""
-    return set(w for w in words if w in WORDS)
+    dictionary = get_words()
+    return set(w for w in words if w in dictionary)
 
 
 def edits1(word):
@@ -63,17 +110,52 @@ def parse_typos_file(loc: str) -> Dict[str, str]:
     return d
 
 
-def get_visible_subdirs(loc: str) -> List[str]:
-    all_files = []
-    for root, dirs, files in os.walk(loc):
-        if any([d.startswith(".") for d in root.split(os.sep) if d != "."]):
-            # Ignore hidden directories
-            # (which are assumed to start with '.')
+def iter_visible_files(loc: str, use_gitignore: bool = True) -> Iterator[str]:
+    """
+    Lazily yield the files under `loc`, in a stable order. Hidden directories
+    (which are assumed to start with '.') and, optionally, paths ignored by
+    git (as by .gitignore files, from the top of the work tree down) are
+    pruned before they are descended into.
+    """
+    gitignores: List[Tuple[str, GitIgnore]] = []
+    if use_gitignore:
+        gitignores = get_outer_gitignores(loc)
+
+    stack = [(loc, gitignores)]
+
+    while stack:
+        root, gitignores = stack.pop()
+
+        try:
+            with os.scandir(root) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
             continue
-        else:
-            all_files.extend([os.path.join(root, filename) for filename in files])
 
-    return all_files
+        if use_gitignore and any(e.name == ".gitignore" for e in entries):
+            gitignore = GitIgnore.from_file(os.path.join(root, ".gitignore"))
+            if gitignore:
+                gitignores = gitignores + [(root, gitignore)]
+
+        subdirs = []
+        for entry in entries:
+            is_dir = entry.is_dir()
+            if is_dir and (entry.name.startswith(".") or entry.is_symlink()):
+                continue
+
+            if gitignores and is_ignored(entry.path, is_dir, gitignores):
+                continue
+
+            if is_dir:
+                subdirs.append((entry.path, gitignores))
+            else:
+                yield entry.path
+
+        stack.extend(reversed(subdirs))
+
+
+def get_visible_subdirs(loc: str) -> List[str]:
+    return list(iter_visible_files(loc))
 
 
 def get_words_in_string(s):
@@ -83,8 +165,8 @@ def get_words_in_string(s):
 
 
 def get_words_in_file(f):
-    with open(f, "r") as ff:
-        lines = ff.readlines()
+    text, _ = read_text(f)
+    lines = text.splitlines()
 
     # Ignore lines that have email addresses
     lines = [line.strip().replace("\\n", "") for line in lines if "@" not in line]
@@ -92,6 +174,11 @@ def get_words_in_file(f):
     return get_words_in_string(" ".join(lines))
 
 
+@lru_cache(maxsize=None)
+def get_known_words(loc: str = KNOWN_WORDS_LOC) -> Set[str]:
+    return set(load_dictionary(loc))
+
+
 def get_default_typos():
     # By default, use typos gathered at
     # https://en.wikipedia.org/wiki/Wikipedia:Lists_of_common_misspellings/For_machines